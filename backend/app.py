@@ -1,25 +1,38 @@
-from flask import Flask, jsonify, request
-from flask_cors import CORS
-import pandas as pd
 import json
 import os
+import threading
 from datetime import datetime
-import traceback
 
-# optional import - google generative api
-try:
-    import google.generativeai as genai
-except Exception:
-    genai = None
+from startup_profile import StartupProfile
+
+# Times every import and dataset load below; reported in /api/health
+startup = StartupProfile()
+
+with startup.step("import", "flask"):
+    from flask import Flask, Response, jsonify, request, stream_with_context
+    from flask_cors import CORS
+
+with startup.step("import", "local modules"):
+    from case_filters import FILTER_FIELDS as SEARCH_FILTER_FIELDS, normalize_filters
+    from case_outcome_model import load_or_train
+    from consultation_store import ConsultationStore
+    from ipc_search import IPCSectionIndex
+    from metrics import REGISTRY, init_app as init_metrics, span
+    from response_cache import cached_json
 
 # Load environment variables from .env file
 try:
-    from dotenv import load_dotenv
-    load_dotenv()
+    with startup.step("import", "dotenv"):
+        from dotenv import load_dotenv
+        load_dotenv()
     print("Loaded .env file")
 except ImportError:
     print("python-dotenv not installed, skipping .env load")
 
+# Defer pandas and the crime datasets until the first request that needs them
+# (faster cold start for scale-to-zero deployments)
+LAZY_STARTUP = os.environ.get("LAZY_STARTUP", "").lower() in ("1", "true", "yes")
+
 app = Flask(__name__)
 
 # Configure CORS for production (Vercel frontend) and development
@@ -34,37 +47,87 @@ CORS(app, resources={
     }
 })
 
+# Per-route latency / request / error metrics, exported on /metrics
+init_metrics(app)
+
 # ---------------- PATHS ----------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
 # ---------------- LOAD DATA ----------------
-try:
-    ipc_df = pd.read_csv(os.path.join(DATA_DIR, "ipc_crime.csv")).fillna(0)
-    ipc_df.columns = ipc_df.columns.str.strip()
-    print(f"Loaded IPC crime data: {len(ipc_df)} rows")
-except Exception as e:
-    print(f"Error loading ipc_crime.csv: {e}")
-    ipc_df = pd.DataFrame()  # empty df
+def load_ipc_df():
+    from crime_snapshot import load_crime_frame
+    try:
+        # Memory-mapped columnar snapshot when up to date (python crime_snapshot.py), else the CSV
+        ipc_df, source = load_crime_frame(os.path.join(DATA_DIR, "ipc_crime.csv"))
+        print(f"Loaded IPC crime data: {len(ipc_df)} rows ({source})")
+    except Exception as e:
+        import pandas as pd
+        print(f"Error loading ipc_crime.csv: {e}")
+        ipc_df = pd.DataFrame()  # empty df
+    return ipc_df
+
+def load_ipc_cube():
+    """Pre-aggregated year x state x district cube for the IPC dashboard endpoints"""
+    import pandas as pd
+    from crime_cube import CrimeCube
+    try:
+        ipc_cube = CrimeCube(get_dataset("ipc_df"))
+        print(f"Built IPC crime cube: {len(ipc_cube.year_codes)} years x {len(ipc_cube.state_codes)} states")
+    except Exception as e:
+        print(f"Error building IPC crime cube: {e}")
+        ipc_cube = CrimeCube(pd.DataFrame())
+    return ipc_cube
 
-try:
-    women_df = pd.read_csv(os.path.join(DATA_DIR, "women_crime.csv")).fillna(0)
-    women_df.columns = women_df.columns.str.strip()
-    print(f"Loaded women crime data: {len(women_df)} rows")
-except Exception as e:
-    print(f"Error loading women_crime.csv: {e}")
-    women_df = pd.DataFrame()  # empty df
+def load_women_df():
+    from crime_snapshot import load_crime_frame
+    try:
+        women_df, source = load_crime_frame(os.path.join(DATA_DIR, "women_crime.csv"))
+        print(f"Loaded women crime data: {len(women_df)} rows ({source})")
+    except Exception as e:
+        import pandas as pd
+        print(f"Error loading women_crime.csv: {e}")
+        women_df = pd.DataFrame()  # empty df
+    return women_df
+
+DATASET_LOADERS = {
+    "ipc_df": load_ipc_df,
+    "ipc_cube": load_ipc_cube,
+    "women_df": load_women_df,
+}
+_datasets = {}
+_datasets_lock = threading.RLock()  # re-entrant: the cube loads ipc_df
+
+def get_dataset(name):
+    """Load a pandas-backed dataset on first use (at boot unless LAZY_STARTUP)"""
+    if name not in _datasets:
+        with _datasets_lock:
+            if name not in _datasets:
+                with startup.step("dataset", name):
+                    _datasets[name] = DATASET_LOADERS[name]()
+    return _datasets[name]
+
+if not LAZY_STARTUP:
+    for name in DATASET_LOADERS:
+        get_dataset(name)
 
 try:
-    with open(os.path.join(DATA_DIR, "ipc_sections.json"), encoding="utf-8") as f:
+    with startup.step("dataset", "ipc_sections"), \
+            open(os.path.join(DATA_DIR, "ipc_sections.json"), encoding="utf-8") as f:
         ipc_sections = json.load(f)
     print(f"Loaded IPC sections: {len(ipc_sections)} items")
 except Exception as e:
     print(f"Error loading ipc_sections.json: {e}")
     ipc_sections = []
 
+# Inverted index over the IPC sections for ranked assistant search
+with startup.step("dataset", "ipc_index"):
+    ipc_index = IPCSectionIndex(ipc_sections)
+print(f"Built IPC section index: {len(ipc_index.vocab)} terms")
+
 try:
-    with open(os.path.join(DATA_DIR, "legal_awareness.json"), encoding="utf-8") as f:
+    with startup.step("dataset", "legal_awareness"), \
+            open(os.path.join(DATA_DIR, "legal_awareness.json"), encoding="utf-8") as f:
         legal_awareness = json.load(f)
     print(f"Loaded legal awareness: {len(legal_awareness)} items")
 except Exception as e:
@@ -72,7 +135,8 @@ except Exception as e:
     legal_awareness = []
 
 try:
-    with open(os.path.join(DATA_DIR, "legal_faqs.json"), encoding="utf-8") as f:
+    with startup.step("dataset", "legal_faqs"), \
+            open(os.path.join(DATA_DIR, "legal_faqs.json"), encoding="utf-8") as f:
         legal_faqs = json.load(f)
     print(f"Loaded legal FAQs: {len(legal_faqs)} items")
 except Exception as e:
@@ -80,13 +144,34 @@ except Exception as e:
     legal_faqs = []
 
 try:
-    with open(os.path.join(DATA_DIR, "helplines.json"), encoding="utf-8") as f:
+    with startup.step("dataset", "helplines"), \
+            open(os.path.join(DATA_DIR, "helplines.json"), encoding="utf-8") as f:
         helplines = json.load(f)
     print(f"Loaded helplines: {len(helplines)} items")
 except Exception as e:
     print(f"Error loading helplines.json: {e}")
     helplines = []
 
+# Case outcome model: trained weights (python case_outcome_model.py), or
+# trained on the spot when missing or older than the CSV
+try:
+    with startup.step("dataset", "case_outcome_model"):
+        case_model = load_or_train()
+    print(f"Loaded case outcome model: {len(case_model.features)} features, classes {case_model.classes}")
+except Exception as e:
+    print(f"Error loading case outcome model: {e}")
+    case_model = None
+
+# Consultation requests live in SQLite (WAL); the old JSON file is imported once
+try:
+    with startup.step("dataset", "consultation_store"):
+        consultation_store = ConsultationStore(os.path.join(DATA_DIR, "consultations.db"))
+        migrated = consultation_store.migrate_json(os.path.join(DATA_DIR, "consultations.json"))
+    print(f"Consultation store ready: {consultation_store.count()} records ({migrated} migrated)")
+except Exception as e:
+    print(f"Error opening consultation store: {e}")
+    consultation_store = None
+
 # ---------------- SUPREME COURT SEARCH ENGINE ----------------
 # Initialize the Supreme Court semantic search engine
 supreme_court_engine = None
@@ -95,10 +180,32 @@ def get_supreme_court_engine():
     """Lazy load Supreme Court search engine to avoid startup delay"""
     global supreme_court_engine
     if supreme_court_engine is None:
-        from supreme_court_search import get_search_engine
+        with startup.step("import", "supreme_court_search"):
+            from supreme_court_search import get_search_engine
         supreme_court_engine = get_search_engine()
     return supreme_court_engine
 
+def supreme_court_cache_samples(field):
+    """Per-cache stats of the search engine for /metrics (none until it is loaded)"""
+    if supreme_court_engine is None:
+        return []
+    return [({"cache": cache}, stats[field]) for cache, stats in supreme_court_engine.cache_stats().items()]
+
+REGISTRY.callback("supreme_court_cache_hits_total", "Supreme Court search cache hits", "counter",
+                  lambda: supreme_court_cache_samples("hits"))
+REGISTRY.callback("supreme_court_cache_misses_total", "Supreme Court search cache misses", "counter",
+                  lambda: supreme_court_cache_samples("misses"))
+REGISTRY.callback("supreme_court_cache_hit_ratio", "Supreme Court search cache hit ratio", "gauge",
+                  lambda: supreme_court_cache_samples("hit_ratio"))
+REGISTRY.callback("supreme_court_search_ready", "1 once the search engine is initialized", "gauge",
+                  lambda: [({}, int(supreme_court_engine is not None and supreme_court_engine.status()["ready"]))])
+
+# Opt-in: load the model and index in a background thread at boot so the
+# first request does not pay the cold start
+if os.environ.get("SUPREME_COURT_WARMUP", "").lower() in ("1", "true", "yes"):
+    get_supreme_court_engine().start_warmup()
+    print("Supreme Court search warm-up started")
+
 # =======================
 # 🔥 ROOT LANDING PAGE
 # =======================
@@ -109,16 +216,22 @@ def landing():
         "status": "Backend is running successfully",
         "available_endpoints": [
             "/api/health",
+            "/metrics",
             "/api/crime/summary",
             "/api/ipc/records",
             "/api/ipc/assistant/search",
             "/api/ipc/assistant/explain",
+            "/api/ipc/assistant/explain/batch",
             "/api/women/dashboard",
             "/api/legal-awareness",
             "/api/legal-faqs",
             "/api/helplines",
+            "/api/chat",
+            "/api/chat/stream",
             "/api/case/predict",
-            "/api/supreme-court/search"
+            "/api/case/predict/batch",
+            "/api/supreme-court/search",
+            "/api/supreme-court/search/batch"
         ],
         "note": "This backend is running locally for project demonstration."
     })
@@ -128,16 +241,32 @@ def landing():
 def health():
     return jsonify({
         "status": "Backend running",
-        "ipc_rows": len(ipc_df),
-        "women_rows": len(women_df),
+        # None until first use under LAZY_STARTUP
+        "ipc_rows": len(_datasets["ipc_df"]) if "ipc_df" in _datasets else None,
+        "women_rows": len(_datasets["women_df"]) if "women_df" in _datasets else None,
         "ipc_sections": len(ipc_sections),
-        "helplines": len(helplines)
+        "helplines": len(helplines),
+        "supreme_court_search": (
+            supreme_court_engine.status() if supreme_court_engine is not None
+            else {"state": "cold", "ready": False}
+        ),
+        "startup": startup.report()
     })
 
+# ---------------- METRICS ----------------
+@app.route("/metrics")
+def metrics():
+    """Prometheus text format; spans cover Supreme Court encode / FAISS search / result assembly"""
+    return REGISTRY.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
 # ---------------- DASHBOARD ----------------
+# Static read endpoints below are computed once and served as cached JSON
+# bytes with ETag / Last-Modified (see response_cache.py)
 @app.route("/api/crime/summary")
+@cached_json(os.path.join(DATA_DIR, "ipc_crime.csv"))
 def crime_summary():
-    return jsonify(
+    ipc_df = get_dataset("ipc_df")
+    return (
         ipc_df.groupby("YEAR")["TOTAL IPC CRIMES"]
         .sum()
         .reset_index()
@@ -146,11 +275,13 @@ def crime_summary():
 
 # ---------------- IPC RECORDS ----------------
 @app.route("/api/ipc/records")
+@cached_json(os.path.join(DATA_DIR, "ipc_crime.csv"))
 def ipc_records():
-    return jsonify({
+    ipc_df = get_dataset("ipc_df")
+    return {
         "available_years": sorted(ipc_df["YEAR"].unique().tolist()),
         "available_states": sorted(ipc_df["STATE/UT"].unique().tolist())
-    })
+    }
 
 # ---------------- IPC DASHBOARD ----------------
 @app.route("/api/ipc/dashboard")
@@ -161,23 +292,7 @@ def ipc_dashboard():
     if not year or not state:
         return jsonify({"error": "year and state required"}), 400
 
-    # Filter data
-    filtered = ipc_df[(ipc_df["YEAR"] == year) & (ipc_df["STATE/UT"] == state)]
-
-    if filtered.empty:
-        return jsonify({"crime_totals": {}})
-
-    # Crime columns (exclude non-crime columns)
-    crime_cols = [col for col in ipc_df.columns if col not in ["STATE/UT", "DISTRICT", "YEAR", "TOTAL IPC CRIMES"]]
-
-    # Sum crimes
-    crime_totals = {}
-    for col in crime_cols:
-        total = filtered[col].sum()
-        if total > 0:
-            crime_totals[col] = int(total)
-
-    return jsonify({"crime_totals": crime_totals})
+    return jsonify({"crime_totals": get_dataset("ipc_cube").crime_totals_for(year, state)})
 
 # ---------------- IPC DISTRICTS ----------------
 @app.route("/api/ipc/districts")
@@ -188,17 +303,8 @@ def ipc_districts():
     if not year or not state:
         return jsonify({"error": "year and state required"}), 400
 
-    # Filter data
-    filtered = ipc_df[(ipc_df["YEAR"] == year) & (ipc_df["STATE/UT"] == state)]
-
-    if filtered.empty:
-        return jsonify([])
-
-    # Group by district, sum TOTAL IPC CRIMES
-    districts = filtered.groupby("DISTRICT")["TOTAL IPC CRIMES"].sum().reset_index()
-    districts = districts.sort_values(by="TOTAL IPC CRIMES", ascending=False).head(20)  # Top 20 districts
-
-    return jsonify(districts.to_dict(orient="records"))
+    # Top 20 districts by TOTAL IPC CRIMES
+    return jsonify(get_dataset("ipc_cube").top_districts_for(year, state))
 
 # ---------------- IPC SEARCH ----------------
 @app.route("/api/ipc/assistant/search")
@@ -207,25 +313,14 @@ def ipc_assistant_search():
     if not query:
         return jsonify([])
 
-    results = [
-        sec for sec in ipc_sections
-        if query in sec["section"].lower()
-        or query in sec["title"].lower()
-        or query in sec["law_text"].lower()
-    ][:5]
-
-    return jsonify(results)
+    # Best 5 matches by BM25, section numbers ranked first
+    return jsonify(ipc_index.search(query, limit=5))
 
 # ---------------- IPC EXPLAIN ----------------
-@app.route("/api/ipc/assistant/explain", methods=["POST"])
-def ipc_assistant_explain():
-    section_no = request.json.get("section", "").strip()
-    section = next((s for s in ipc_sections if s["section"] == section_no), None)
-
-    if not section:
-        return jsonify({"error": "Section not found"}), 404
+MAX_EXPLAIN_BATCH = 100
 
-    return jsonify({
+def explain_section(section):
+    return {
         "section": section["section"],
         "title": section["title"],
         "law_text": section["law_text"],
@@ -234,10 +329,45 @@ def ipc_assistant_explain():
             "and the punishment prescribed under Indian Penal Code. "
             "Provided for educational understanding only."
         )
-    })
+    }
+
+@app.route("/api/ipc/assistant/explain", methods=["POST"])
+def ipc_assistant_explain():
+    section_no = request.json.get("section", "").strip()
+    section = ipc_index.get(section_no)
+
+    if not section:
+        return jsonify({"error": "Section not found"}), 404
+
+    return jsonify(explain_section(section))
+
+@app.route("/api/ipc/assistant/explain/batch", methods=["POST"])
+def ipc_assistant_explain_batch():
+    """
+    Accepts POST with JSON: { sections: ["302", "304B", ...] }
+    Returns explanations in request order plus the section numbers not found.
+    """
+    data = request.json or {}
+    section_nos = data.get("sections", [])
+
+    if not isinstance(section_nos, list) or not section_nos:
+        return jsonify({"error": "sections must be a non-empty list"}), 400
+    if len(section_nos) > MAX_EXPLAIN_BATCH:
+        return jsonify({"error": f"at most {MAX_EXPLAIN_BATCH} sections per request"}), 400
+
+    results, not_found = [], []
+    for section_no in section_nos:
+        section = ipc_index.get(str(section_no))
+        if section:
+            results.append(explain_section(section))
+        else:
+            not_found.append(section_no)
+
+    return jsonify({"results": results, "not_found": not_found})
 
 # ---------------- WOMEN DASHBOARD ----------------
 @app.route("/api/women/dashboard")
+@cached_json(os.path.join(DATA_DIR, "women_crime.csv"))
 def women_dashboard():
     crime_cols = [
         "No. of Rape cases",
@@ -249,11 +379,13 @@ def women_dashboard():
         "Women Trafficking"
     ]
 
-    df = women_df.copy()
+    import pandas as pd
+
+    df = get_dataset("women_df").copy()
     df[crime_cols] = df[crime_cols].apply(pd.to_numeric, errors="coerce").fillna(0)
     df["TOTAL"] = df[crime_cols].sum(axis=1)
 
-    return jsonify({
+    return {
         "state_wise": (
             df.groupby("State")["TOTAL"]
             .sum()
@@ -262,20 +394,23 @@ def women_dashboard():
             .head(10)
             .to_dict(orient="records")
         )
-    })
+    }
 
 # ---------------- LEGAL AWARENESS ----------------
 @app.route("/api/legal-awareness")
+@cached_json(os.path.join(DATA_DIR, "legal_awareness.json"))
 def get_legal_awareness():
-    return jsonify(legal_awareness)
+    return legal_awareness
 
 @app.route("/api/legal-faqs")
+@cached_json(os.path.join(DATA_DIR, "legal_faqs.json"))
 def get_legal_faqs():
-    return jsonify(legal_faqs)
+    return legal_faqs
 
 @app.route("/api/helplines")
+@cached_json(os.path.join(DATA_DIR, "helplines.json"))
 def get_helplines():
-    return jsonify(helplines)
+    return helplines
 
 
 # ---------------- CONSULTATION REQUESTS ----------------
@@ -284,7 +419,7 @@ def consultation_request():
     """
     Accepts POST with JSON:
     { name, phone, email, preferred_method, message, cost }
-    Stores a simple record in data/consultations.json and returns success.
+    Stores a record in data/consultations.db and returns success.
     """
     data = request.json or {}
     name = data.get("name", "").strip()
@@ -298,7 +433,6 @@ def consultation_request():
         return jsonify({"error": "name and phone are required"}), 400
 
     consult_record = {
-        "id": int(datetime.utcnow().timestamp()),
         "name": name,
         "phone": phone,
         "email": email,
@@ -308,140 +442,159 @@ def consultation_request():
         "received_at": datetime.utcnow().isoformat() + "Z"
     }
 
-    consultations_path = os.path.join(DATA_DIR, "consultations.json")
     try:
-        if os.path.exists(consultations_path):
-            with open(consultations_path, "r", encoding="utf-8") as f:
-                existing = json.load(f) or []
-        else:
-            existing = []
-
-        existing.append(consult_record)
-
-        with open(consultations_path, "w", encoding="utf-8") as f:
-            json.dump(existing, f, ensure_ascii=False, indent=2)
+        if consultation_store is None:
+            raise RuntimeError("consultation store unavailable")
+        consult_id = consultation_store.add(consult_record)
 
     except Exception as e:
         return jsonify({"error": "failed to save consultation", "detail": str(e)}), 500
 
     # In a real app you might trigger an SMS/call API or notify lawyers here.
-    return jsonify({"status": "success", "message": "Consultation request received"}), 201
+    return jsonify({"status": "success", "message": "Consultation request received", "id": consult_id}), 201
 
 
 # ---------------- CHAT / AI PROXY ----------------
+chat_proxy = None
+
+def get_chat_proxy():
+    """Pooled Gemini client, created on the first chat request (requests is slow to import)"""
+    global chat_proxy
+    if chat_proxy is None:
+        with startup.step("import", "chat_proxy"):
+            from chat_proxy import ChatProxy
+        chat_proxy = ChatProxy()
+    return chat_proxy
+
+REGISTRY.callback("chat_active_streams", "Chat replies currently streaming from the LLM API", "gauge",
+                  lambda: [({}, chat_proxy.active if chat_proxy is not None else 0)])
+
+def chat_request():
+    """Validated (message, history, api_key, model) or an error response"""
+    data = request.json or {}
+    message = data.get("message", "")
+    history = data.get("history", [])
+
+    if not isinstance(message, str) or not message.strip():
+        return None, (jsonify({"error": "message is required"}), 400)
+    message = message.strip()
+    if not isinstance(history, list):
+        return None, (jsonify({"error": "history must be a list"}), 400)
+    for turn in history:
+        if not (isinstance(turn, dict) and turn.get("role") in ("user", "assistant", "model")
+                and isinstance(turn.get("content", ""), str)):
+            return None, (jsonify({"error": "history items must be {role: 'user'|'assistant', content: string}"}), 400)
+
+    api_key = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
+    model = os.environ.get("GEMINI_MODEL") or os.environ.get("GOOGLE_MODEL")
+
+    if not api_key:
+        return None, (jsonify({"error": "GEMINI_API_KEY not set on server"}), 500)
+
+    return (message, history, api_key, model), None
+
+def chat_error(e):
+    """Map chat proxy failures to HTTP statuses"""
+    from chat_proxy import ChatBusy, ChatDeadlineExceeded
+
+    if isinstance(e, ChatBusy):
+        return jsonify({"error": "chat is busy, try again shortly", "detail": str(e)}), 429, {"Retry-After": "1"}
+    if isinstance(e, ChatDeadlineExceeded):
+        return jsonify({"error": "chat timed out", "detail": str(e)}), 504
+    return jsonify({"error": "chat failed", "detail": str(e)}), 502
+
+def sse(data, event=None):
+    """One Server-Sent Events frame"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 @app.route("/api/chat", methods=["POST"])
-def chat_proxy():
+def chat_reply():
     """
     Proxy endpoint to forward user messages to Gemini / Google Generative API.
     Expects JSON: { message: string, history?: [{role:'user'|'assistant', content: string}] }
     Reads GEMINI_API_KEY (or GOOGLE_API_KEY) and GEMINI_MODEL from environment.
+    Returns the whole reply; /api/chat/stream sends it as it is generated.
     """
-    data = request.json or {}
-    message = data.get("message", "").strip()
-    history = data.get("history", [])
+    args, error = chat_request()
+    if error:
+        return error
 
-    if not message:
-        return jsonify({"error": "message is required"}), 400
+    proxy = get_chat_proxy()
+    try:
+        with span("chat.reply"):
+            reply = proxy.reply(*args)
+    except Exception as e:
+        return chat_error(e)
 
-    api_key = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
-    model = os.environ.get("GEMINI_MODEL") or os.environ.get("GOOGLE_MODEL") or "models/gemini-1.0"
+    return jsonify({"reply": reply})
 
-    if not api_key:
-        return jsonify({"error": "GEMINI_API_KEY not set on server"}), 500
+@app.route("/api/chat/stream", methods=["POST"])
+def chat_stream():
+    """
+    Same request as /api/chat. Streams Server-Sent Events:
+      data: {"delta": "..."}           one per text chunk
+      event: done / data: {"reply": "..."}   the full reply, last
+      event: error / data: {"error": "..."}  if the reply fails midway
+    Errors before the first chunk (busy, upstream refused) are plain JSON
+    with 429 / 502 / 504.
+    """
+    args, error = chat_request()
+    if error:
+        return error
 
+    proxy = get_chat_proxy()
     try:
-        # prefer official library if available
-        if genai is not None:
-            genai.configure(api_key=api_key)
-            # build messages in expected format
-            msgs = []
-            for h in history:
-                role = h.get("role", "user")
-                content = h.get("content", "")
-                msgs.append({"author": role, "content": [{"type": "text","text": content}]})
-
-            msgs.append({"author": "user", "content": [{"type": "text", "text": message}]})
-
-            resp = genai.chat.create(model=model, messages=msgs)
-            # try to extract text
-            reply = ""
-            try:
-                for part in resp.output:
-                    if isinstance(part, dict) and part.get("content"):
-                        for c in part.get("content"):
-                            if c.get("type") == "text":
-                                reply += c.get("text", "")
-                    elif isinstance(part, str):
-                        reply += part
-            except Exception:
-                # fallback
-                reply = str(resp)
-
-            return jsonify({"reply": reply})
-
-        # fallback to REST HTTP call
-        import requests
-        url = f"https://generativelanguage.googleapis.com/v1beta2/{model}:generateMessage?key={api_key}"
-        payload = {
-            "messages": [
-                *[{"author": {"role": h.get("role", "user")}, "content": [{"type":"text","text": h.get("content","")}] } for h in history],
-                {"author": {"role": "user"}, "content": [{"type":"text","text": message}]}
-            ]
-        }
-        r = requests.post(url, json=payload, timeout=30)
-        r.raise_for_status()
-        jr = r.json()
-        # extract text reply heuristically
-        reply = ""
-        try:
-            # older API names
-            if "candidates" in jr:
-                for c in jr.get("candidates", []):
-                    reply += c.get("content", "")
-            elif "output" in jr:
-                for item in jr.get("output", []):
-                    if isinstance(item, dict) and item.get("content"):
-                        for c in item.get("content"):
-                            if c.get("type") == "text":
-                                reply += c.get("text", "")
-            else:
-                reply = jr.get("response", "") or str(jr)
-        except Exception:
-            reply = str(jr)
-
-        return jsonify({"reply": reply})
-
+        stream = proxy.open_stream(*args)
     except Exception as e:
-        tb = traceback.format_exc()
-        return jsonify({"error": "chat failed", "detail": str(e), "trace": tb}), 500
+        return chat_error(e)
+
+    def events():
+        reply = []
+        try:
+            for delta in stream:
+                reply.append(delta)
+                yield sse({"delta": delta})
+            yield sse({"reply": "".join(reply)}, event="done")
+        except Exception as e:
+            yield sse({"error": "chat failed", "detail": str(e)}, event="error")
+        finally:
+            stream.close()
+
+    resp = Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # A body closed before its first chunk never runs the finally above;
+    # free the slot and upstream connection when the response closes
+    resp.call_on_close(stream.close)
+    return resp
 
 # ---------------- CASE OUTCOME ----------------
+MAX_PREDICT_BATCH = 10000
+
 @app.route("/api/case/predict", methods=["POST"])
 def predict_case():
-    data = request.json
-    evidence = data.get("evidence_strength", "Moderate")
-    past = data.get("past_record", "None")
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Case details must be a JSON object"}), 400
+    if case_model is None:
+        return jsonify({"error": "Case outcome model is not available"}), 503
 
-    score = 50
-    score += 25 if evidence == "Strong" else 15 if evidence == "Moderate" else 5
-    score += 10 if past == "Serious" else 5 if past == "Minor" else 0
-    score = min(score, 95)
+    prediction = case_model.predict([data])[0]
 
     return jsonify({
         "possible_outcome": {
-            "probability": f"{score}%",
-            "result": "Conviction" if score >= 60 else "Acquittal",
-            "basis": "Based on case facts and evidence strength"
+            "probability": f"{round(prediction['probability'] * 100)}%",
+            "result": prediction["result"],
+            "probabilities": prediction["probabilities"],
+            "basis": f"Model trained on {case_model.metrics.get('cases', 0):.0f} past case outcomes"
         },
-        "key_factors": [
+        "key_factors": case_model.explain(data, prediction["result"]) or [
             "Strength of available evidence",
-            "Nature of the offense",
-            "Legal precedents in similar cases",
-            "Criminal history consideration"
+            "Nature of the offense"
         ],
         "ai_reasoning": (
-            "Based on the provided information, the evidence strength and "
-            "nature of the offense significantly influence outcomes. "
+            "The prediction comes from a statistical model of past outcomes for "
+            "cases with similar type, section, evidence and record. "
             "This is an educational simulation, not a legal prediction."
         ),
         "next_steps": [
@@ -455,36 +608,96 @@ def predict_case():
         )
     })
 
+@app.route("/api/case/predict/batch", methods=["POST"])
+def predict_case_batch():
+    """
+    Score a whole docket in one vectorized call
+    Accepts: POST {"cases": [{"case_type": "...", "evidence_strength": "...", ...}, ...]}
+    Returns: One prediction per case, in request order
+    """
+    data = request.get_json(silent=True) or {}
+    cases = data.get("cases")
+
+    if not isinstance(cases, list) or not cases:
+        return jsonify({"error": "cases must be a non-empty list"}), 400
+    if len(cases) > MAX_PREDICT_BATCH:
+        return jsonify({"error": f"at most {MAX_PREDICT_BATCH} cases per request"}), 400
+    if not all(isinstance(case, dict) for case in cases):
+        return jsonify({"error": "every case must be an object"}), 400
+    if case_model is None:
+        return jsonify({"error": "Case outcome model is not available"}), 503
+
+    return jsonify({
+        "total_cases": len(cases),
+        "predictions": case_model.predict(cases),
+        "classes": case_model.classes,
+        "disclaimer": (
+            "This tool is for educational understanding purposes only "
+            "and does not constitute legal advice."
+        )
+    })
+
 # ---------------- SUPREME COURT SEARCH ----------------
+MAX_SEARCH_BATCH = 32
+MAX_SEARCH_TOP_K = 20
+
+def search_options(data):
+    """
+    top_k and metadata filters of a search request, validated
+    Returns: (top_k, filters, None) or (None, None, error message)
+    """
+    top_k = data.get("top_k", 5)
+    try:
+        top_k = None if isinstance(top_k, (bool, float)) else int(top_k)
+    except (TypeError, ValueError):
+        top_k = None
+    if top_k is None or not 1 <= top_k <= MAX_SEARCH_TOP_K:
+        return None, None, f"top_k must be between 1 and {MAX_SEARCH_TOP_K}"
+
+    filters = data.get("filters")
+    if filters is None:
+        filters = {field: data[field] for field in SEARCH_FILTER_FIELDS if data.get(field)}
+    try:
+        filters = normalize_filters(filters)
+    except ValueError as e:
+        return None, None, str(e)
+    return top_k, filters, None
+
 @app.route("/api/supreme-court/search", methods=["GET", "POST"])
 def supreme_court_search():
     """
     Semantic search endpoint for Supreme Court judgments
-    Accepts: ?q=query OR POST {"query": "..."}
-    Returns: Top 5 most relevant Supreme Court cases
+    Accepts: ?q=query&top_k=5&date_from=2010&date_to=2015-06-30&case_name=...&bench=...
+             OR POST {"query": "...", "top_k": 5, "filters": {"date_from": "2010", ...}}
+    Returns: Top top_k (default 5) most relevant Supreme Court cases matching the filters
     """
     try:
         # Get query from GET or POST
         if request.method == "POST":
-            data = request.get_json()
-            query = data.get("query", "").strip()
+            data = request.get_json(silent=True) or {}
+            query = str(data.get("query", "")).strip()
         else:
+            data = request.args
             query = request.args.get("q", "").strip()
         
         # Validate query
         if not query:
             return jsonify({
                 "error": "Query parameter is required",
-                "example": "/api/supreme-court/search?q=remand order validity under PMLA"
+                "example": "/api/supreme-court/search?q=remand order validity under PMLA&date_from=2015"
             }), 400
+        top_k, filters, error = search_options(data)
+        if error:
+            return jsonify({"error": error}), 400
         
-        # Get search engine and perform search
+        # Get search engine and perform search (filters are applied inside the index search)
         engine = get_supreme_court_engine()
-        results = engine.search(query, top_k=5)
+        results = engine.search(query, top_k=top_k, filters=filters)
         
         # Return results
         return jsonify({
             "query": query,
+            "filters": filters,
             "total_results": len(results),
             "results": results,
             "note": "All answers are derived from verified Supreme Court judgments. No legal opinions generated."
@@ -497,6 +710,50 @@ def supreme_court_search():
             "note": "If this is the first request, the system is building the search index. Please wait and try again."
         }), 500
 
+@app.route("/api/supreme-court/search/batch", methods=["POST"])
+def supreme_court_search_batch():
+    """
+    Batched semantic search: all queries are encoded and searched together
+    Accepts: POST {"queries": ["...", "..."], "top_k": 5, "filters": {...}}
+    Returns: One result list per query, in request order
+    """
+    data = request.get_json(silent=True) or {}
+    queries = data.get("queries", [])
+
+    if not isinstance(queries, list) or not queries:
+        return jsonify({"error": "queries must be a non-empty list"}), 400
+    if len(queries) > MAX_SEARCH_BATCH:
+        return jsonify({"error": f"at most {MAX_SEARCH_BATCH} queries per request"}), 400
+    queries = [str(q).strip() for q in queries]
+    if not all(queries):
+        return jsonify({"error": "queries must not be empty"}), 400
+    top_k, filters, error = search_options(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        engine = get_supreme_court_engine()
+        batch_results = engine.search_many(queries, top_k=top_k, filters=filters)
+
+        return jsonify({
+            "filters": filters,
+            "results": [
+                {"query": query, "total_results": len(results), "results": results}
+                for query, results in zip(queries, batch_results)
+            ],
+            "note": "All answers are derived from verified Supreme Court judgments. No legal opinions generated."
+        })
+
+    except Exception as e:
+        return jsonify({
+            "error": "Search failed",
+            "message": str(e),
+            "note": "If this is the first request, the system is building the search index. Please wait and try again."
+        }), 500
+
+startup.mark_ready()
+startup.print_report()
+
 # ---------------- RUN ----------------
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
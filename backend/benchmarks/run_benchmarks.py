@@ -0,0 +1,256 @@
+"""
+Backend Benchmarks
+Standalone runner for the hot paths: IPC search and dashboards, the women
+dashboard, concurrent consultation writes, and Supreme Court index build and
+search over a synthetic corpus. Results are written as JSON so runs on two
+commits can be compared.
+
+Usage (from backend/):
+    python benchmarks/run_benchmarks.py                       # everything -> benchmarks/results/<commit>.json
+    python benchmarks/run_benchmarks.py --suite app --quick
+    python benchmarks/run_benchmarks.py --suite supreme_court --cases 20000 --index-type hnsw
+    python benchmarks/run_benchmarks.py --suite supreme_court --index-unit passage
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/abc1234.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_corpus import generate_cases, sample_queries  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+def summarize(samples: List[float], wall_seconds: float = None, **extra) -> Dict:
+    """Latency percentiles (ms) and throughput of one benchmark"""
+    ms = np.asarray(samples) * 1000
+    wall_seconds = wall_seconds if wall_seconds is not None else float(np.sum(samples))
+    return {
+        "iterations": len(samples),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "min_ms": round(float(ms.min()), 4),
+        "max_ms": round(float(ms.max()), 4),
+        "ops_per_s": round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+        **extra,
+    }
+
+
+def measure(fn: Callable[[int], None], iterations: int, concurrency: int = 1, warmup: int = 3, **extra) -> Dict:
+    """Call fn(i) iterations times across concurrency threads; extra is stored with the result"""
+    for i in range(warmup):
+        fn(-1 - i)
+
+    def timed(i):
+        start = time.perf_counter()
+        fn(i)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if concurrency == 1:
+        samples = [timed(i) for i in range(iterations)]
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            samples = list(pool.map(timed, range(iterations)))
+    return summarize(samples, time.perf_counter() - start, concurrency=concurrency, **extra)
+
+
+def _check(response, status=200):
+    if response.status_code != status:
+        raise RuntimeError(f"unexpected {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+
+def bench_app(args, results: Dict):
+    import app as backend_app
+    from consultation_store import ConsultationStore
+
+    client = backend_app.app.test_client()
+    cube = backend_app.get_dataset("ipc_cube")
+    pairs = list(itertools.product(sorted(cube.year_codes), sorted(cube.state_codes)))
+    queries = ["murder", "498A", "dowry death", "theft of property", "304", "cheating and dishonestly",
+               "criminal intimidation", "wrongful restraint", "sedition", "kidnapping from lawful guardianship"]
+    n = args.iterations
+
+    def search(i):
+        _check(client.get("/api/ipc/assistant/search", query_string={"q": queries[i % len(queries)]}))
+
+    def dashboard(i):
+        year, state = pairs[i % len(pairs)]
+        _check(client.get("/api/ipc/dashboard", query_string={"year": year, "state": state}))
+
+    def districts(i):
+        year, state = pairs[i % len(pairs)]
+        _check(client.get("/api/ipc/districts", query_string={"year": year, "state": state}))
+
+    def women(i):
+        _check(client.get("/api/women/dashboard"))
+
+    def women_uncached(i):
+        backend_app.women_dashboard.cache.invalidate()
+        _check(client.get("/api/women/dashboard"))
+
+    results["ipc_assistant_search"] = measure(search, n)
+    results["ipc_dashboard"] = measure(dashboard, n)
+    results["ipc_districts"] = measure(districts, n)
+    results["women_dashboard"] = measure(women, n)
+    results["women_dashboard_uncached"] = measure(women_uncached, max(n // 10, 10))
+
+    # Consultation writes go to a throwaway database, never data/consultations.db
+    with tempfile.TemporaryDirectory() as tmp:
+        original_store = backend_app.consultation_store
+        backend_app.consultation_store = ConsultationStore(os.path.join(tmp, "consultations.db"))
+        try:
+            def consult(i):
+                _check(client.post("/api/consultation", json={
+                    "name": f"Bench {i}", "phone": "9999999999", "email": "bench@example.com",
+                    "preferred_method": "call", "message": "benchmark", "cost": 500,
+                }), 201)
+
+            for concurrency in args.concurrency:
+                results[f"consultation_request_c{concurrency}"] = measure(consult, n, concurrency)
+        finally:
+            backend_app.consultation_store = original_store
+
+
+def bench_supreme_court(args, results: Dict):
+    from supreme_court_search import SupremeCourtSearchEngine
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "supreme_court.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(generate_cases(args.cases, args.seed), f)
+
+        def engine():
+            # Caches off so every query is encoded and searched
+            return SupremeCourtSearchEngine(json_path, batch_max_size=1, cache_size=0,
+                                            index_type=args.index_type, data_dir=tmp,
+                                            index_unit=args.index_unit)
+
+        sc = engine()
+        start = time.perf_counter()
+        sc._ensure_initialized()
+        results["supreme_court_index_build"] = {
+            "seconds": round(time.perf_counter() - start, 3), "cases": args.cases, "index_type": args.index_type,
+            "index_unit": args.index_unit, "vectors": int(sc.index.ntotal),
+        }
+
+        # Reopening reuses the saved index (no re-encoding)
+        start = time.perf_counter()
+        engine()._ensure_initialized()
+        results["supreme_court_index_load"] = {"seconds": round(time.perf_counter() - start, 3), "cases": args.cases}
+
+        queries = sample_queries(args.iterations * max(args.batch_size, 1) + 10, args.seed + 1)
+        results["supreme_court_search"] = measure(lambda i: sc.search(queries[i % len(queries)], top_k=5),
+                                                  args.iterations, cases=args.cases)
+
+        batch = args.batch_size
+
+        def search_many(i):
+            offset = (i % args.iterations) * batch
+            sc.search_many(queries[offset:offset + batch], top_k=5)
+
+        results[f"supreme_court_search_many_b{batch}"] = measure(search_many, args.iterations, cases=args.cases)
+
+        for concurrency in args.concurrency:
+            if concurrency > 1:
+                results[f"supreme_court_search_c{concurrency}"] = measure(
+                    lambda i: sc.search(queries[i % len(queries)], top_k=5), args.iterations, concurrency,
+                    cases=args.cases,
+                )
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(old: Dict, new: Dict):
+    """Print mean latency change per benchmark (negative is faster)"""
+    print(f"\n{'benchmark':<40} {'old':>10} {'new':>10} {'change':>8}")
+    for name, result in new["results"].items():
+        before = old.get("results", {}).get(name)
+        key = "mean_ms" if "mean_ms" in result else "seconds"
+        if not before or key not in before:
+            print(f"{name:<40} {'-':>10} {result[key]:>10} {'new':>8}")
+            continue
+        change = (result[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+        print(f"{name:<40} {before[key]:>10} {result[key]:>10} {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the backend hot paths")
+    parser.add_argument("--suite", choices=["all", "app", "supreme_court"], default="all")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--cases", type=int, default=5000, help="synthetic Supreme Court corpus size")
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--index-unit", choices=["question", "passage"], default="question")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="20 iterations, 1000 cases")
+    parser.add_argument("-o", "--output", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+    if args.quick:
+        args.iterations, args.cases = 20, 1000
+
+    results = {}
+    if args.suite in ("all", "app"):
+        bench_app(args, results)
+    if args.suite in ("all", "supreme_court"):
+        bench_supreme_court(args, results)
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for name, result in results.items():
+        summary = f"{result['mean_ms']} ms mean, {result['p95_ms']} ms p95" if "mean_ms" in result \
+            else f"{result['seconds']} s"
+        print(f"{name:<40} {summary}")
+    print(f"✅ Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Synthetic Judgment Corpus
+Deterministic generator of supreme_court.json-shaped records (case_name,
+judgement_date, question, answer) for benchmarks; the real dataset is not in
+the repository
+
+Usage:
+    python benchmarks/synthetic_corpus.py /tmp/supreme_court.json --cases 5000
+"""
+
+import argparse
+import json
+import random
+from typing import Dict, List
+
+PARTIES = [
+    "State of Maharashtra", "Union of India", "State of Uttar Pradesh", "Directorate of Enforcement",
+    "Central Bureau of Investigation", "State of Punjab", "Reserve Bank of India", "State of Kerala",
+    "Municipal Corporation of Delhi", "Income Tax Officer", "State of Tamil Nadu", "Securities and Exchange Board of India",
+]
+PETITIONERS = [
+    "Ramesh Kumar", "Sunita Devi", "Arjun Singh", "Mohd. Salim", "Lakshmi Narayanan", "Priya Sharma",
+    "Harish Chandra", "M/s Bharat Steels Ltd.", "Gurpreet Kaur", "Joseph Thomas", "Anil Yadav", "Fatima Begum",
+]
+TOPICS = [
+    ("bail", "anticipatory bail under Section 438 CrPC", "the accused is entitled to bail where custody is not necessary for investigation"),
+    ("pmla", "attachment of proceeds of crime under Section 5 PMLA", "the twin conditions of Section 45 PMLA must be satisfied before release"),
+    ("dowry", "dowry death under Section 304B IPC", "the presumption under Section 113B of the Evidence Act arises once cruelty soon before death is shown"),
+    ("murder", "conviction for murder under Section 302 IPC", "circumstantial evidence must form a complete chain pointing only to the guilt of the accused"),
+    ("article21", "the right to life and personal liberty under Article 21", "procedure established by law must be just, fair and reasonable"),
+    ("sanction", "prior sanction for prosecution of a public servant", "sanction under Section 197 CrPC is required only for acts done in official duty"),
+    ("tax", "reopening of assessment under the Income Tax Act", "reasons to believe must be recorded before notice is issued"),
+    ("contract", "specific performance of an agreement to sell", "readiness and willingness of the plaintiff must be proved throughout"),
+    ("custody", "police custody and remand of the accused", "remand cannot be ordered mechanically without application of mind"),
+    ("arbitration", "setting aside an arbitral award under Section 34", "the court cannot re-appreciate evidence while examining the award"),
+    ("service", "termination of a government servant without inquiry", "Article 311 requires a reasonable opportunity of being heard"),
+    ("land", "compensation for compulsory land acquisition", "market value is determined on the date of the preliminary notification"),
+]
+QUESTION_FORMS = [
+    "Whether {issue} was lawful on the facts of the case?",
+    "What is the settled position of law on {issue}?",
+    "Can the High Court interfere with {issue} in its writ jurisdiction?",
+    "Whether the appellant could challenge {issue} after a delay of {years} years?",
+]
+FILLER = [
+    "The appellant contended that the impugned order suffers from non-application of mind.",
+    "The respondent relied on the findings recorded by the courts below.",
+    "Having heard learned counsel for the parties and perused the record,",
+    "the High Court erred in not considering the material placed on record.",
+    "We find no reason to interfere with the concurrent findings of fact.",
+    "Accordingly the appeal is allowed and the matter is remitted for fresh consideration.",
+]
+
+
+def generate_cases(count: int, seed: int = 0, answer_sentences: int = 6) -> List[Dict]:
+    """count synthetic judgments; the same seed always gives the same corpus"""
+    rng = random.Random(seed)
+    cases = []
+    for i in range(count):
+        _, issue, holding = rng.choice(TOPICS)
+        question = rng.choice(QUESTION_FORMS).format(issue=issue, years=rng.randint(2, 15))
+        answer = " ".join(
+            [f"Held that {holding}."] + rng.choices(FILLER, k=answer_sentences) + [f"(Case no. {i + 1})"]
+        )
+        cases.append({
+            "case_name": f"{rng.choice(PETITIONERS)} v. {rng.choice(PARTIES)}",
+            "judgement_date": f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{rng.randint(1975, 2024)}",
+            "question": question,
+            "answer": answer,
+        })
+    return cases
+
+
+def sample_queries(count: int, seed: int = 1) -> List[str]:
+    """Distinct free-text queries shaped like user questions"""
+    rng = random.Random(seed)
+    queries = []
+    for i in range(count):
+        _, issue, _ = rng.choice(TOPICS)
+        queries.append(f"{rng.choice(['when is', 'law on', 'explain', 'can court allow'])} {issue} ({i})")
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic supreme_court.json")
+    parser.add_argument("output")
+    parser.add_argument("--cases", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(generate_cases(args.cases, args.seed), f, ensure_ascii=False)
+    print(f"✅ Wrote {args.cases} synthetic cases to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
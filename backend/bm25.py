@@ -0,0 +1,71 @@
+"""
+BM25 Inverted Index
+Shared lexical ranking used by the IPC section search and the Supreme Court
+hybrid retriever
+"""
+
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens"""
+    return TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    def __init__(self, documents: Iterable[List[str]], k1: float = 1.5, b: float = 0.75):
+        """Build postings from pre-tokenized documents (one token list per row)"""
+        postings = defaultdict(list)
+        doc_len = []
+        for i, tokens in enumerate(documents):
+            doc_len.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings[term].append((i, tf))
+
+        # Documents never change after build, so store final BM25 weights per posting
+        doc_len = np.asarray(doc_len, dtype=np.float64)
+        self.n_docs = len(doc_len)
+        avg_len = doc_len.mean() if self.n_docs else 0.0
+        self.postings = {}
+        for term, plist in postings.items():
+            ids = np.fromiter((d for d, _ in plist), dtype=np.int32, count=len(plist))
+            tf = np.fromiter((t for _, t in plist), dtype=np.float64, count=len(plist))
+            idf = np.log(1 + (self.n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            norm = k1 * (1 - b + b * doc_len[ids] / avg_len)
+            self.postings[term] = (ids, idf * tf * (k1 + 1) / (tf + norm))
+        self.vocab = sorted(self.postings)
+
+    def scores(self, terms: Iterable[str]) -> np.ndarray:
+        """Dense BM25 score per document; only postings of the query terms are touched"""
+        scores = np.zeros(self.n_docs, dtype=np.float64)
+        for term in set(terms):
+            if term in self.postings:
+                ids, weights = self.postings[term]
+                scores[ids] += weights
+        return scores
+
+    def top(self, terms: Iterable[str], limit: int, rows: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and scores of the best matching documents, best first (only among rows, if given)"""
+        scores = self.scores(terms)
+        hits = np.flatnonzero(scores) if rows is None else rows[scores[rows] > 0]
+        if hits.size > limit:
+            hits = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+        order = hits[np.lexsort((hits, -scores[hits]))]
+        return order, scores[order]
+
+    def prefix_terms(self, prefix: str, limit: int) -> List[str]:
+        """Vocabulary terms starting with prefix"""
+        start = bisect_left(self.vocab, prefix)
+        terms = []
+        for term in self.vocab[start:start + limit]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
@@ -0,0 +1,128 @@
+"""
+Case Metadata Filters
+Precomputed per-attribute row sets for Supreme Court search (judgment dates in
+sorted order, word postings of case names and benches) so date range and name
+filters select rows before the FAISS search instead of post-filtering results
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from bm25 import tokenize
+
+# Formats seen in judgement_date; parsed dates are stored as YYYYMMDD ints
+DATE_FORMATS = ("%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y", "%Y-%m-%d", "%d %B %Y", "%d %b %Y", "%B %d, %Y")
+FILTER_FIELDS = ("date_from", "date_to", "case_name", "bench")
+TEXT_FIELDS = ("case_name", "bench")
+EMPTY_ROWS = np.zeros(0, dtype=np.int32)
+
+
+def parse_date(value) -> int:
+    """YYYYMMDD of a judgment date string, or 0 when it cannot be parsed"""
+    text = str(value or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return parsed.year * 10000 + parsed.month * 100 + parsed.day
+    return 0
+
+
+def parse_bound(value, end: bool = False) -> int:
+    """
+    A filter date as YYYYMMDD. A bare year ("2015") means its first day, or
+    its last day for the end of a range. Raises ValueError if unparseable.
+    """
+    if isinstance(value, int) and not isinstance(value, bool) and value > 9999:
+        return value  # already normalized
+    text = str(value).strip()
+    if text.isdigit() and len(text) == 4:
+        return int(text) * 10000 + (1231 if end else 101)
+    date = parse_date(text)
+    if not date:
+        raise ValueError(f"Unrecognized date '{text}', expected YYYY, YYYY-MM-DD or DD-MM-YYYY")
+    return date
+
+
+def normalize_filters(filters: Optional[Dict]) -> Dict:
+    """
+    Validated filters with empty values dropped: date_from / date_to as
+    YYYYMMDD ints, case_name / bench as lowercase words. Raises ValueError
+    on unknown fields or bad dates.
+    """
+    if not filters:
+        return {}
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object")
+    unknown = set(filters) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown filter(s) {sorted(unknown)}, expected {list(FILTER_FIELDS)}")
+
+    normalized = {}
+    for field in ("date_from", "date_to"):
+        if filters.get(field) not in (None, ""):
+            normalized[field] = parse_bound(filters[field], end=field == "date_to")
+    if "date_from" in normalized and "date_to" in normalized and normalized["date_from"] > normalized["date_to"]:
+        raise ValueError("date_from must not be after date_to")
+    for field in TEXT_FIELDS:
+        words = tokenize(str(filters.get(field) or ""))
+        if words:
+            normalized[field] = " ".join(words)
+    return normalized
+
+
+class CaseFilterIndex:
+    def __init__(self, records: Iterable[Dict]):
+        """One pass over the records; row i of the index is record i"""
+        dates = []
+        postings = {field: defaultdict(list) for field in TEXT_FIELDS}
+        for row, item in enumerate(records):
+            dates.append(parse_date(item.get("judgement_date")))
+            for field in TEXT_FIELDS:
+                value = item.get(field) or ""
+                if isinstance(value, list):  # bench may be a list of judges
+                    value = " ".join(map(str, value))
+                for term in set(tokenize(str(value))):
+                    postings[field][term].append(row)
+
+        self.n_rows = len(dates)
+        self.dates = np.asarray(dates, dtype=np.int32)
+        # Rows by date, so a date range is two binary searches and a slice
+        self.date_order = np.argsort(self.dates, kind="stable").astype(np.int32)
+        self.sorted_dates = self.dates[self.date_order]
+        self.postings = {
+            field: {term: np.asarray(rows, dtype=np.int32) for term, rows in terms.items()}
+            for field, terms in postings.items()
+        }
+        self.undated = int(np.count_nonzero(self.dates == 0))
+
+    def rows(self, filters: Dict) -> Optional[np.ndarray]:
+        """
+        Sorted rows matching every (normalized) filter, or None when no filter
+        is set. Undated records never match a date range; name filters need
+        every word to appear.
+        """
+        selected = None
+        if "date_from" in filters or "date_to" in filters:
+            start = np.searchsorted(self.sorted_dates, filters.get("date_from", 1), side="left")
+            end = np.searchsorted(self.sorted_dates, filters.get("date_to", 99991231), side="right")
+            selected = np.sort(self.date_order[start:end])
+
+        for field in TEXT_FIELDS:
+            for term in filters.get(field, "").split():
+                rows = self.postings[field].get(term, EMPTY_ROWS)
+                selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+        return selected
+
+    def stats(self) -> Dict:
+        return {
+            "rows": self.n_rows,
+            "undated": self.undated,
+            "date_range": [int(self.sorted_dates[self.undated]), int(self.sorted_dates[-1])]
+            if self.n_rows > self.undated else None,
+            "benches": bool(self.postings["bench"]),
+        }
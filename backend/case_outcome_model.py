@@ -0,0 +1,232 @@
+"""
+Case Outcome Model
+Multinomial logistic regression, in NumPy, trained on case_outcome_dataset.csv
+(see generate_case_dataset.py). Features are one-hot case attributes plus the
+words of the facts summary; the trained weights are saved as a small .npz that
+the app loads once at startup, and whole dockets are scored in one matrix
+product.
+
+Usage (from backend/):
+    python case_outcome_model.py        # train -> data/case_outcome_model.npz
+"""
+
+import csv
+import hashlib
+import os
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from bm25 import tokenize
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.path.join(BASE_DIR, "case_outcome_dataset.csv")
+MODEL_PATH = os.path.join(BASE_DIR, "data", "case_outcome_model.npz")
+
+CATEGORICAL_FIELDS = ("case_type", "ipc_section", "evidence_strength", "past_criminal_record",
+                      "severity", "victim_impact")
+TEXT_FIELD = "case_facts_summary"
+TARGET_FIELD = "outcome"
+# Request field names that differ from the dataset columns
+FIELD_ALIASES = {"past_record": "past_criminal_record"}
+FIELD_LABELS = {
+    "case_type": "Case type", "ipc_section": "Section", "evidence_strength": "Evidence strength",
+    "past_criminal_record": "Past criminal record", "severity": "Severity", "victim_impact": "Victim impact",
+}
+# Facts words must occur in this many training cases to become features
+MIN_WORD_COUNT = 2
+FILLER_WORDS = {"a", "an", "and", "are", "as", "based", "by", "of", "on", "or", "the", "to", "with"}
+
+
+def read_cases(path: str = DATASET_PATH) -> List[Dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def file_sha1(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def facts_words(text: str) -> set:
+    return {word for word in tokenize(text) if word not in FILLER_WORDS}
+
+
+def case_value(case: Dict, field: str) -> str:
+    """Field of a case as sent by the API or read from the CSV (missing is "")"""
+    value = case.get(field)
+    if value is None:
+        for alias, target in FIELD_ALIASES.items():
+            if target == field and case.get(alias) is not None:
+                value = case[alias]
+    return str(value or "").strip()
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def fit_weights(X: np.ndarray, y: np.ndarray, n_classes: int, l2: float = 1e-2,
+                epochs: int = 2000, learning_rate: float = 0.5) -> Tuple[np.ndarray, np.ndarray]:
+    """Full-batch gradient descent on L2-regularized softmax cross-entropy"""
+    n, d = X.shape
+    weights = np.zeros((d, n_classes), dtype=np.float64)
+    bias = np.zeros(n_classes, dtype=np.float64)
+    targets = np.eye(n_classes)[y]
+    for _ in range(epochs):
+        error = (softmax(X @ weights + bias) - targets) / n
+        weights -= learning_rate * (X.T @ error + l2 * weights)
+        bias -= learning_rate * error.sum(axis=0)
+    return weights, bias
+
+
+class CaseOutcomeModel:
+    def __init__(self, features: Sequence[str], classes: Sequence[str], weights: np.ndarray,
+                 bias: np.ndarray, source_sha1: str = "", metrics: Dict = None):
+        """features are "field=value" (one-hot) or "word=token" (facts summary) names"""
+        self.features = list(features)
+        self.classes = list(classes)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.source_sha1 = source_sha1
+        self.metrics = metrics or {}
+        self.feature_index = {name: i for i, name in enumerate(self.features)}
+
+    @classmethod
+    def fit(cls, cases: List[Dict], source_sha1: str = "", **train_args) -> "CaseOutcomeModel":
+        words = Counter(word for case in cases for word in facts_words(case_value(case, TEXT_FIELD)))
+        features = sorted({f"{field}={case_value(case, field)}" for case in cases
+                           for field in CATEGORICAL_FIELDS if case_value(case, field)})
+        features += sorted(f"word={word}" for word, count in words.items() if count >= MIN_WORD_COUNT)
+        classes = sorted({case_value(case, TARGET_FIELD) for case in cases})
+
+        model = cls(features, classes, np.zeros((len(features), len(classes))), np.zeros(len(classes)), source_sha1)
+        y = np.array([classes.index(case_value(case, TARGET_FIELD)) for case in cases])
+        model.weights, model.bias = (a.astype(np.float32) for a in
+                                     fit_weights(model.encode(cases), y, len(classes), **train_args))
+        model.metrics = {"cases": len(cases), "train_accuracy": round(model.accuracy(cases), 4)}
+        return model
+
+    def encode(self, cases: List[Dict]) -> np.ndarray:
+        """
+        Binary feature matrix (cases x features); unseen values have no
+        feature. Each field is encoded once per distinct value and gathered
+        into the rows, so a docket of repetitive cases costs little more than
+        its distinct values.
+        """
+        X = np.zeros((len(cases), len(self.features)), dtype=np.float32)
+        for field in CATEGORICAL_FIELDS + (TEXT_FIELD,):
+            values, inverse = np.unique(np.array([case_value(case, field) for case in cases], dtype=str),
+                                        return_inverse=True)
+            distinct = np.zeros((len(values), len(self.features)), dtype=np.float32)
+            for i, value in enumerate(values.tolist()):
+                if field == TEXT_FIELD:
+                    names = [f"word={word}" for word in facts_words(value)]
+                else:
+                    names = [f"{field}={value}"]
+                distinct[i, [self.feature_index[name] for name in names if name in self.feature_index]] = 1.0
+            X += distinct[inverse]
+        return X
+
+    def predict_proba(self, cases: List[Dict]) -> np.ndarray:
+        """Class probabilities (cases x classes) from one matrix product"""
+        return softmax(self.encode(cases) @ self.weights + self.bias)
+
+    def predict(self, cases: List[Dict]) -> List[Dict]:
+        """Most likely outcome, its probability and every class probability per case"""
+        probabilities = self.predict_proba(cases)
+        best = probabilities.argmax(axis=1)
+        return [
+            {
+                "result": self.classes[k],
+                "probability": round(float(p[k]), 4),
+                "probabilities": {name: round(float(value), 4) for name, value in zip(self.classes, p)},
+            }
+            for k, p in zip(best.tolist(), probabilities)
+        ]
+
+    def accuracy(self, cases: List[Dict]) -> float:
+        predicted = self.predict_proba(cases).argmax(axis=1)
+        expected = np.array([self.classes.index(case_value(case, TARGET_FIELD)) for case in cases])
+        return float((predicted == expected).mean())
+
+    def explain(self, case: Dict, outcome: str, top: int = 4) -> List[str]:
+        """Features of the case that push hardest towards outcome, as readable labels"""
+        x = self.encode([case])[0]
+        k = self.classes.index(outcome)
+        # Weight for this class relative to the average class
+        contribution = x * (self.weights[:, k] - self.weights.mean(axis=1))
+        factors = []
+        for col in np.argsort(-contribution)[:top]:
+            if contribution[col] <= 0:
+                break
+            field, value = self.features[col].split("=", 1)
+            factors.append(f"Facts mention \"{value}\"" if field == "word" else f"{FIELD_LABELS[field]}: {value}")
+        return factors
+
+    def save(self, path: str = MODEL_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, features=np.array(self.features), classes=np.array(self.classes),
+                 weights=self.weights, bias=self.bias, source_sha1=np.array(self.source_sha1),
+                 metric_names=np.array(list(self.metrics), dtype=str),
+                 metric_values=np.array(list(self.metrics.values()), dtype=np.float64))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> "CaseOutcomeModel":
+        with np.load(path, allow_pickle=False) as data:
+            metrics = dict(zip(data["metric_names"].tolist(), data["metric_values"].tolist()))
+            return cls(data["features"].tolist(), data["classes"].tolist(), data["weights"], data["bias"],
+                       str(data["source_sha1"]), metrics)
+
+
+def cross_validate(cases: List[Dict], folds: int = 5, seed: int = 0) -> float:
+    """Mean held-out accuracy over k folds"""
+    order = np.random.default_rng(seed).permutation(len(cases))
+    scores = []
+    for fold in np.array_split(order, folds):
+        held_out = set(fold.tolist())
+        train = [case for i, case in enumerate(cases) if i not in held_out]
+        scores.append(CaseOutcomeModel.fit(train).accuracy([cases[i] for i in fold]))
+    return float(np.mean(scores))
+
+
+def train(dataset_path: str = DATASET_PATH, model_path: str = MODEL_PATH, folds: int = 5) -> CaseOutcomeModel:
+    cases = read_cases(dataset_path)
+    model = CaseOutcomeModel.fit(cases, file_sha1(dataset_path))
+    if folds > 1:
+        model.metrics["cv_accuracy"] = round(cross_validate(cases, folds), 4)
+    model.save(model_path)
+    return model
+
+
+def load_or_train(dataset_path: str = DATASET_PATH, model_path: str = MODEL_PATH) -> CaseOutcomeModel:
+    """The saved model if it was trained on the current CSV, else train (and save) a new one"""
+    if os.path.exists(model_path):
+        model = CaseOutcomeModel.load(model_path)
+        if model.source_sha1 == file_sha1(dataset_path):
+            return model
+        print("⚠️ Case outcome model is older than the dataset, retraining")
+    model = CaseOutcomeModel.fit(read_cases(dataset_path), file_sha1(dataset_path))
+    try:
+        model.save(model_path)
+    except OSError as e:
+        print(f"⚠️ Could not save case outcome model: {e}")
+    return model
+
+
+def main():
+    model = train()
+    print(f"✅ Trained case outcome model on {model.metrics['cases']:.0f} cases "
+          f"({len(model.features)} features, classes {model.classes})")
+    print(f"   train accuracy {model.metrics['train_accuracy']:.3f}, "
+          f"cross-validated accuracy {model.metrics.get('cv_accuracy', float('nan')):.3f}")
+    print(f"   saved to {MODEL_PATH}")
+
+
+if __name__ == "__main__":
+    main()
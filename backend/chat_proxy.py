@@ -0,0 +1,198 @@
+"""
+Chat Proxy
+Streams Gemini replies over a pooled HTTP session, with a deadline per request
+and a cap on concurrent upstream calls so slow LLM replies cannot take every
+worker thread
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+
+# Point at a local mock (python mock_llm_server.py) for testing
+API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com").rstrip("/")
+DEFAULT_MODEL = "models/gemini-1.5-flash"
+DEADLINE_SECONDS = float(os.environ.get("CHAT_DEADLINE_SECONDS", "30"))
+CONNECT_TIMEOUT_SECONDS = 5.0
+# Longest wait for the next chunk; a reply can overrun its deadline by at most this
+IDLE_TIMEOUT_SECONDS = float(os.environ.get("CHAT_IDLE_TIMEOUT_SECONDS", "10"))
+MAX_CONCURRENCY = int(os.environ.get("CHAT_MAX_CONCURRENCY", "8"))
+# How long a request may wait for a free upstream slot before getting a 429
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get("CHAT_QUEUE_TIMEOUT_SECONDS", "0.5"))
+
+
+class ChatBusy(Exception):
+    """Every upstream slot is taken"""
+
+
+class ChatDeadlineExceeded(Exception):
+    """The reply did not finish within the request deadline"""
+
+
+class ChatUpstreamError(Exception):
+    """The LLM API refused the request or returned something unusable"""
+
+
+def build_contents(message: str, history: List[Dict]) -> List[Dict]:
+    """Chat history in Gemini generateContent format (assistant turns are "model")"""
+    contents = []
+    for turn in history or []:
+        role = "model" if turn.get("role") in ("assistant", "model") else "user"
+        contents.append({"role": role, "parts": [{"text": turn.get("content", "")}]})
+    contents.append({"role": "user", "parts": [{"text": message}]})
+    return contents
+
+
+def extract_text(chunk: Dict) -> str:
+    """Text of one streamed GenerateContentResponse"""
+    text = ""
+    for candidate in chunk.get("candidates", []):
+        for part in candidate.get("content", {}).get("parts", []):
+            text += part.get("text", "")
+    return text
+
+
+class ChatStream:
+    """
+    Iterator over reply text deltas. Holds an upstream slot until it is
+    exhausted or closed (Flask closes it when the client disconnects).
+    """
+
+    def __init__(self, response: requests.Response, deadline: float, release):
+        self.response = response
+        self.deadline = deadline
+        self._release = release
+        self._closed = False
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            for line in self.response.iter_lines(decode_unicode=True):
+                if time.monotonic() > self.deadline:
+                    raise ChatDeadlineExceeded("chat reply exceeded the deadline")
+                if not line or not line.startswith("data:"):
+                    continue
+                try:
+                    chunk = json.loads(line[len("data:"):].strip())
+                except ValueError:
+                    raise ChatUpstreamError(f"malformed stream chunk: {line[:200]}")
+                if "error" in chunk:
+                    raise ChatUpstreamError(chunk["error"].get("message", str(chunk["error"])))
+                text = extract_text(chunk)
+                if text:
+                    yield text
+        except requests.exceptions.Timeout:
+            if time.monotonic() > self.deadline:
+                raise ChatDeadlineExceeded("chat reply exceeded the deadline")
+            raise ChatDeadlineExceeded("LLM API stopped sending the reply")
+        except requests.exceptions.ConnectionError as e:
+            # requests reports a read timeout mid-stream as a ConnectionError
+            if e.args and isinstance(e.args[0], ReadTimeoutError):
+                raise ChatDeadlineExceeded("LLM API stopped sending the reply")
+            raise ChatUpstreamError(str(e))
+        except requests.exceptions.RequestException as e:
+            raise ChatUpstreamError(str(e))
+        finally:
+            self.close()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.response.close()
+            self._release()
+
+
+class ChatProxy:
+    def __init__(self, api_base: str = API_BASE, deadline: float = DEADLINE_SECONDS,
+                 max_concurrency: int = MAX_CONCURRENCY, queue_timeout: float = QUEUE_TIMEOUT_SECONDS,
+                 idle_timeout: float = IDLE_TIMEOUT_SECONDS):
+        self.api_base = api_base
+        self.deadline = deadline
+        self.idle_timeout = idle_timeout
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.active = 0
+        self._session = None
+        self._session_pid = None
+
+    def session(self) -> requests.Session:
+        """One keep-alive connection pool per process (sockets must not cross a fork)"""
+        if self._session is None or self._session_pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+                    self._session_pid = os.getpid()
+        return self._session
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise ChatBusy(f"all {self.max_concurrency} chat slots are busy")
+        with self._lock:
+            self.active += 1
+
+    def _release(self):
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+    def open_stream(self, message: str, history: List[Dict], api_key: str,
+                    model: Optional[str] = None) -> ChatStream:
+        """
+        Start a streamed reply. Raises ChatBusy, ChatDeadlineExceeded or
+        ChatUpstreamError before any text is produced, so callers can still
+        answer with a plain error status.
+        """
+        model = model or DEFAULT_MODEL
+        if not model.startswith("models/"):
+            model = "models/" + model
+
+        # Built before taking a slot: a bad history item fails here, holding nothing
+        payload = {"contents": build_contents(message, history)}
+
+        self._acquire()
+        try:
+            deadline = time.monotonic() + self.deadline
+            try:
+                response = self.session().post(
+                    f"{self.api_base}/v1beta/{model}:streamGenerateContent",
+                    params={"alt": "sse"},
+                    headers={"x-goog-api-key": api_key},
+                    json=payload,
+                    stream=True,
+                    # The read timeout bounds each wait for a chunk and the
+                    # deadline is checked as each one arrives, so a stalled reply
+                    # holds its slot for at most deadline + one idle timeout
+                    timeout=(CONNECT_TIMEOUT_SECONDS, min(self.idle_timeout, self.deadline)),
+                )
+            except requests.exceptions.Timeout:
+                raise ChatDeadlineExceeded("LLM API did not respond before the deadline")
+            except requests.exceptions.RequestException as e:
+                raise ChatUpstreamError(str(e))
+
+            if response.status_code != 200:
+                try:
+                    detail = response.text[:500]
+                finally:
+                    response.close()
+                raise ChatUpstreamError(f"LLM API returned {response.status_code}: {detail}")
+        except BaseException:
+            # Whatever went wrong before the stream exists, give the slot back
+            self._release()
+            raise
+
+        return ChatStream(response, deadline, self._release)
+
+    def reply(self, message: str, history: List[Dict], api_key: str, model: Optional[str] = None) -> str:
+        """Whole reply at once (the non-streaming /api/chat)"""
+        return "".join(self.open_stream(message, history, api_key, model))
@@ -0,0 +1,116 @@
+"""
+Consultation Store
+SQLite (WAL mode) storage for consultation requests, safe for concurrent
+writes from several gunicorn workers
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List
+
+COLUMNS = ["name", "phone", "email", "preferred_method", "message", "cost", "received_at"]
+
+
+class ConsultationStore:
+    def __init__(self, db_path: str):
+        """Open (or create) the database at db_path"""
+        self.db_path = db_path
+        self._local = threading.local()
+
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS consultations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    phone TEXT NOT NULL,
+                    email TEXT,
+                    preferred_method TEXT,
+                    message TEXT,
+                    cost TEXT,
+                    received_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread and process (connections must not cross a fork)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            # WAL lets readers run alongside the single writer; NORMAL syncs at
+            # checkpoints instead of on every commit
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def add(self, record: Dict) -> int:
+        """Insert one consultation and return its id"""
+        values = [record.get(col) for col in COLUMNS]
+        values[COLUMNS.index("cost")] = _encode_cost(record.get("cost"))
+
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                f"INSERT INTO consultations ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                values
+            )
+        return cursor.lastrowid
+
+    def all(self) -> List[Dict]:
+        """All consultations, oldest first"""
+        rows = self._connect().execute("SELECT * FROM consultations ORDER BY id").fetchall()
+        return [{**dict(row), "cost": _decode_cost(row["cost"])} for row in rows]
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM consultations").fetchone()[0]
+
+    def migrate_json(self, json_path: str) -> int:
+        """
+        Import records from the old data/consultations.json once. Returns the
+        number of records imported (0 if already migrated or nothing to import).
+        """
+        if not os.path.exists(json_path):
+            return 0
+
+        conn = self._connect()
+        with conn:
+            # The migrations row is claimed inside the import transaction, so
+            # concurrent workers cannot import twice
+            claimed = conn.execute(
+                "INSERT OR IGNORE INTO migrations (name) VALUES (?)", ("consultations.json",)
+            ).rowcount
+            if not claimed:
+                return 0
+
+            with open(json_path, "r", encoding="utf-8") as f:
+                records = json.load(f) or []
+
+            for record in records:
+                values = [record.get(col) for col in COLUMNS]
+                values[COLUMNS.index("cost")] = _encode_cost(record.get("cost"))
+                # Timestamp ids may collide; a taken id gets a fresh one
+                taken = conn.execute(
+                    "SELECT 1 FROM consultations WHERE id = ?", (record.get("id"),)
+                ).fetchone()
+                record_id = None if taken else record.get("id")
+                conn.execute(
+                    f"INSERT INTO consultations (id, {', '.join(COLUMNS)}) VALUES (?, {', '.join('?' * len(COLUMNS))})",
+                    [record_id] + values
+                )
+
+        return len(records)
+
+
+def _encode_cost(cost):
+    """cost is free-form in the API (number, string or null); keep it as JSON"""
+    return None if cost is None else json.dumps(cost)
+
+
+def _decode_cost(cost):
+    return None if cost is None else json.loads(cost)
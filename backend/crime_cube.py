@@ -0,0 +1,89 @@
+"""
+IPC Crime Cube
+Pre-aggregates the district-wise IPC crime data into NumPy arrays keyed by
+integer-coded year / state / district so dashboard queries become lookups
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+# Columns of ipc_crime.csv that are not crime counts
+NON_CRIME_COLS = ["STATE/UT", "DISTRICT", "YEAR", "TOTAL IPC CRIMES"]
+
+
+class CrimeCube:
+    def __init__(self, df: pd.DataFrame, top_districts: int = 20):
+        """Build the cube once from the loaded ipc_crime.csv dataframe"""
+        self.top_districts = top_districts
+        self.crime_cols = [col for col in df.columns if col not in NON_CRIME_COLS]
+
+        if df.empty:
+            self.year_codes = {}
+            self.state_codes = {}
+            self.districts = np.array([], dtype=object)
+            self.crime_totals = np.zeros((0, 0, len(self.crime_cols)))
+            self.district_totals = np.zeros((0, 0, 0))
+            self.district_rows = np.zeros((0, 0, 0), dtype=np.int32)
+            return
+
+        # Integer-code the three dimensions
+        year_idx, years = pd.factorize(df["YEAR"], sort=True)
+        state_idx, states = pd.factorize(df["STATE/UT"], sort=True)
+        district_idx, districts = pd.factorize(df["DISTRICT"], sort=True)
+
+        self.year_codes = {int(y): i for i, y in enumerate(years)}
+        self.state_codes = {s: i for i, s in enumerate(states)}
+        self.districts = np.asarray(districts, dtype=object)
+
+        shape = (len(years), len(states))
+
+        # year x state x crime column sums
+        values = (
+            df[self.crime_cols]
+            .apply(pd.to_numeric, errors="coerce")
+            .fillna(0)
+            .to_numpy(dtype=np.float64)
+        )
+        self.crime_totals = np.zeros(shape + (len(self.crime_cols),))
+        np.add.at(self.crime_totals, (year_idx, state_idx), values)
+
+        # year x state x district sums of TOTAL IPC CRIMES, plus row counts so
+        # districts reporting zero crimes are still listed
+        totals = pd.to_numeric(df["TOTAL IPC CRIMES"], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+        self.district_totals = np.zeros(shape + (len(districts),))
+        self.district_rows = np.zeros(shape + (len(districts),), dtype=np.int32)
+        np.add.at(self.district_totals, (year_idx, state_idx, district_idx), totals)
+        np.add.at(self.district_rows, (year_idx, state_idx, district_idx), 1)
+
+    def _lookup(self, year: int, state: str):
+        """Map a (year, state) pair to cube coordinates, or None if absent"""
+        y = self.year_codes.get(year)
+        s = self.state_codes.get(state)
+        if y is None or s is None or not self.district_rows[y, s].any():
+            return None
+        return y, s
+
+    def crime_totals_for(self, year: int, state: str) -> Dict[str, int]:
+        """Non-zero crime column totals for one state in one year"""
+        coords = self._lookup(year, state)
+        if coords is None:
+            return {}
+
+        row = self.crime_totals[coords]
+        return {self.crime_cols[i]: int(row[i]) for i in np.flatnonzero(row > 0)}
+
+    def top_districts_for(self, year: int, state: str) -> List[Dict]:
+        """Districts of a state ranked by TOTAL IPC CRIMES for one year"""
+        coords = self._lookup(year, state)
+        if coords is None:
+            return []
+
+        present = np.flatnonzero(self.district_rows[coords])
+        totals = self.district_totals[coords][present]
+        order = np.argsort(-totals, kind="stable")[:self.top_districts]
+
+        return [
+            {"DISTRICT": self.districts[present[i]], "TOTAL IPC CRIMES": int(totals[i])}
+            for i in order
+        ]
@@ -0,0 +1,144 @@
+"""
+Crime Data Snapshot
+Typed columnar snapshot of the crime CSVs (one .npy per column, text columns
+as categorical codes) that workers memory-map at startup instead of parsing CSV
+
+Usage:
+    python crime_snapshot.py            # rebuild snapshots of every crime CSV
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+CRIME_CSVS = ["ipc_crime.csv", "women_crime.csv"]
+
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_dir_for(csv_path: str) -> str:
+    """data/ipc_crime.csv -> data/ipc_crime.snapshot/"""
+    return os.path.splitext(csv_path)[0] + ".snapshot"
+
+
+def read_crime_csv(csv_path: str) -> pd.DataFrame:
+    """The CSV as app.py has always loaded it"""
+    df = pd.read_csv(csv_path).fillna(0)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def _source_signature(csv_path: str) -> Dict:
+    """Size and content hash of the CSV; mtimes change on every checkout"""
+    with open(csv_path, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return {"size": os.path.getsize(csv_path), "sha1": digest}
+
+
+def _smallest_int(values: np.ndarray) -> np.dtype:
+    for dtype in (np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if values.size == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def build_snapshot(csv_path: str) -> str:
+    """Write the snapshot of csv_path next to it and return its directory"""
+    df = read_crime_csv(csv_path)
+    snapshot_dir = snapshot_dir_for(csv_path)
+    tmp_dir = snapshot_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        column = {"name": name, "file": f"{i}.npy"}
+        if series.dtype.kind in "iu":
+            values = series.to_numpy()
+            values = values.astype(_smallest_int(values))
+        elif series.dtype.kind in "fb":
+            values = series.to_numpy()
+        else:
+            # Text dimensions (state, district): codes into sorted categories
+            codes, categories = pd.factorize(series.astype(str), sort=True)
+            values = codes.astype(_smallest_int(codes))
+            column["categories"] = categories.tolist()
+        np.save(os.path.join(tmp_dir, column["file"]), values, allow_pickle=False)
+        columns.append(column)
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "source": os.path.basename(csv_path),
+        "rows": len(df),
+        "columns": columns,
+        **_source_signature(csv_path),
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+    # Swap in the finished snapshot so a reader never sees a partial one
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+    os.rename(tmp_dir, snapshot_dir)
+    return snapshot_dir
+
+
+def load_snapshot(csv_path: str):
+    """
+    Memory-mapped dataframe from the snapshot of csv_path, or None if there
+    is no snapshot or it no longer matches the CSV
+    """
+    snapshot_dir = snapshot_dir_for(csv_path)
+    meta_path = os.path.join(snapshot_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != SNAPSHOT_VERSION:
+        return None
+    if os.path.exists(csv_path):
+        if os.path.getsize(csv_path) != meta["size"] or _source_signature(csv_path)["sha1"] != meta["sha1"]:
+            return None
+
+    data = {}
+    for column in meta["columns"]:
+        values = np.load(os.path.join(snapshot_dir, column["file"]), mmap_mode="r")
+        if "categories" in column:
+            data[column["name"]] = pd.Categorical.from_codes(values, categories=column["categories"])
+        else:
+            data[column["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def load_crime_frame(csv_path: str):
+    """
+    Load a crime CSV, preferring its snapshot. Returns (df, source) where
+    source is "snapshot" or "csv".
+    """
+    try:
+        df = load_snapshot(csv_path)
+        if df is not None:
+            return df, "snapshot"
+    except Exception as e:
+        print(f"Error loading snapshot of {os.path.basename(csv_path)}, falling back to CSV: {e}")
+    return read_crime_csv(csv_path), "csv"
+
+
+def main():
+    for name in CRIME_CSVS:
+        csv_path = os.path.join(DATA_DIR, name)
+        snapshot_dir = build_snapshot(csv_path)
+        print(f"✅ {name} -> {os.path.relpath(snapshot_dir, BASE_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,225 @@
-import re
+"""
+IPC Text to JSON
+Line-oriented streaming parser for bare-act text produced by pdf_to_text.py.
+Sections are yielded one at a time and written as JSON Lines (or a streamed
+JSON array) as they are parsed, so memory stays flat and time linear in the
+input size.
+
+Each record has section, title and law_text (the full section text, as
+before) plus structured sub_sections, explanations, illustrations and
+exceptions. Malformed sections are reported rather than silently dropped.
+
+Usage:
+    python ipc_text_to_json.py                               # ipc_full_text.txt -> ipc_sections.jsonl
+    python ipc_text_to_json.py crpc.txt -o crpc_sections.jsonl --report crpc_problems.json
+    python ipc_text_to_json.py -o ipc_sections.json          # JSON array, as loaded by app.py
+"""
+
+import argparse
 import json
+import os
+import re
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# "302." alone on a line starts a section (the side note / title follows)
+MARKER_RE = re.compile(r"^(\d{1,3}[A-Z]{0,2})\.$")
+# Footnote blocks start at a dashed rule and end at the page number below them
+RULE_RE = re.compile(r"^-{10,}$")
+PAGE_NO_RE = re.compile(r"^\d+$")
+CHAPTER_RE = re.compile(r"^CHAPTER [IVXLC]+[A-Z]?$")
+# Amendment markers such as "3*[" may prefix any line
+AMENDMENT_PREFIX = r"(?:\d+\*)?\[?"
+BLOCK_RE = re.compile(AMENDMENT_PREFIX + r"(Explanation|Illustrations?|Exception)\b")
+ITEM_RE = re.compile(r"^" + AMENDMENT_PREFIX + r"\(([a-z]{1,4}|\d+)\)\s*")
+SUB_SECTION_RE = re.compile(r"(?:^|(?<=--)|(?<=\n))" + AMENDMENT_PREFIX + r"\((\d+)\)\s*")
+
+MIN_BODY_CHARS = 30
+
+
+def iter_lines(path):
+    """Stream lines without trailing newlines"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def _split_items(lines):
+    """Split lines into "(a) ..." / "(1) ..." items; text without markers is one item"""
+    items = []
+    for line in lines:
+        if ITEM_RE.match(line) or not items:
+            items.append(line)
+        else:
+            items[-1] += "\n" + line
+    return [item.strip() for item in items if item.strip()]
+
+
+def _structure(body_lines):
+    """Sub-sections, explanations, illustrations and exceptions of one section body"""
+    main_lines = []
+    blocks = []  # (kind, lines) of explanation / illustration / exception blocks
+    current = main_lines
+    next_sub_section = 1
+    for line in body_lines:
+        match = BLOCK_RE.match(line)
+        item = ITEM_RE.match(line)
+        if match:
+            current = [line]
+            blocks.append((match.group(1).lower().rstrip("s"), current))
+            continue
+        if item and item.group(1) == str(next_sub_section) and current is not main_lines:
+            # "(2)" after an Explanation of sub-section (1) resumes the main text
+            current = main_lines
+        current.append(line)
+        if current is main_lines:
+            for number in SUB_SECTION_RE.findall(line):
+                next_sub_section = int(number) + 1
+
+    # parts = [preamble, "1", text1, "2", text2, ...]
+    parts = SUB_SECTION_RE.split("\n".join(main_lines))
+    fields = {
+        "sub_sections": [
+            {"number": parts[i], "text": parts[i + 1].strip()} for i in range(1, len(parts) - 1, 2)
+        ],
+        "explanations": [], "illustrations": [], "exceptions": [],
+    }
+    for kind, lines in blocks:
+        if kind == "illustration":
+            # The heading line ("Illustrations") is dropped; items follow
+            fields["illustrations"].extend(_split_items(lines[1:]))
+        else:
+            fields[kind + "s"].append("\n".join(lines).strip())
+    return fields
+
+
+def _finish(number, title_lines, body_lines, start_line, problems):
+    """Build the record for one section, or report why it is malformed"""
+    if not body_lines and any("Rep." in line for line in title_lines):
+        # Repealed sections have only a bracketed heading: "[Definition of "Queen".] Rep. by ..."
+        body_lines, title_lines = title_lines, []
+    if not body_lines:
+        problems.append({"section": number, "line": start_line, "problem": "no section body found"})
+        return None
+
+    law_text = "\n".join(body_lines).strip()
+    if len(law_text) < MIN_BODY_CHARS:
+        problems.append({"section": number, "line": start_line, "problem": "body too short", "text": law_text})
+        return None
+
+    title = " ".join(line.strip() for line in title_lines).strip()
+    if not title:
+        # No side note: take the heading from the body ("59. [Title.] Rep. by ...")
+        heading = re.sub(r"^" + AMENDMENT_PREFIX + re.escape(number) + r"\.?\s*", "", body_lines[0])
+        title = heading.split("]")[0].lstrip("[") if "] Rep" in heading else heading.split("--")[0]
+        title = title.strip()
+
+    record = {"section": number, "title": title, "law_text": law_text}
+    record.update(_structure(body_lines))
+    record["repealed"] = bool(re.search(r"\]\s*Rep\.", law_text[:300]))
+    return record
+
+
+def parse_sections(lines, problems):
+    """
+    Generator over section records of a bare act. Appends malformed
+    sections (with line numbers) to problems.
+    """
+    number = None
+    title_lines, body_lines = [], []
+    start_line = 0
+    body_start = None
+    in_footnotes = False
+    in_chapter_heading = False
+    seen = set()
+
+    for line_no, raw in enumerate(lines, 1):
+        line = raw.strip()
+
+        if RULE_RE.match(line):
+            in_footnotes = True
+            continue
+        if PAGE_NO_RE.match(line):
+            in_footnotes = False
+            continue
+        if in_footnotes or not line:
+            continue
+        if CHAPTER_RE.match(line):
+            in_chapter_heading = True
+            continue
+        if in_chapter_heading:
+            # Chapter names are upper case ("OF PUNISHMENTS"); "6." is not one
+            if line.upper() == line and not MARKER_RE.match(line):
+                continue
+            in_chapter_heading = False
+
+        marker = MARKER_RE.match(line)
+        if marker:
+            if number is not None:
+                record = _finish(number, title_lines, body_lines, start_line, problems)
+                if record:
+                    yield record
+            number = marker.group(1)
+            title_lines, body_lines = [], []
+            start_line = line_no
+            body_start = re.compile(r"^" + AMENDMENT_PREFIX + re.escape(number) + r"\.?\s")
+            if number in seen:
+                problems.append({"section": number, "line": line_no, "problem": "duplicate section number"})
+            seen.add(number)
+            continue
+
+        if number is None:
+            continue  # preamble before the first section
+        if body_lines or body_start.match(line):
+            body_lines.append(line)
+        else:
+            title_lines.append(line)
+
+    if number is not None:
+        record = _finish(number, title_lines, body_lines, start_line, problems)
+        if record:
+            yield record
+
+
+def write_sections(records, output_path):
+    """Write records incrementally: JSON Lines for .jsonl, a streamed JSON array otherwise"""
+    count = 0
+    as_array = not output_path.endswith(".jsonl")
+    with open(output_path, "w", encoding="utf-8") as f:
+        if as_array:
+            f.write("[")
+        for record in records:
+            if as_array:
+                f.write(",\n  " if count else "\n  ")
+                f.write(json.dumps(record, ensure_ascii=False))
+            else:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+        if as_array:
+            f.write("\n]\n")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse bare-act text into section records")
+    parser.add_argument("input", nargs="?", default=os.path.join(BASE_DIR, "ipc_full_text.txt"))
+    parser.add_argument("-o", "--output", default=os.path.join(BASE_DIR, "ipc_sections.jsonl"),
+                        help=".jsonl for JSON Lines, .json for a JSON array")
+    parser.add_argument("--report", help="write malformed sections to this JSON file")
+    args = parser.parse_args()
+
+    problems = []
+    count = write_sections(parse_sections(iter_lines(args.input), problems), args.output)
+
+    for problem in problems:
+        print(f"⚠️  line {problem['line']}: section {problem['section']}: {problem['problem']}", file=sys.stderr)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(problems, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ Extracted {count} sections ({len(problems)} problems reported)")
+
 
-with open(
-    "ipc_full_text.txt",
-    "r",
-    encoding="utf-8"
-) as f:
-    text = f.read()
-
-# 🔥 UPDATED REGEX (NO 'Section' WORD)
-pattern = re.compile(
-    r"\n(\d{1,3}[A-Z]?)\.\s+(.*?)\n(.*?)(?=\n\d{1,3}[A-Z]?\.\s+|\Z)",
-    re.S
-)
-
-sections = []
-
-for match in pattern.finditer(text):
-    section_no = match.group(1).strip()
-    title = match.group(2).strip()
-    body = match.group(3).strip()
-
-    if len(body) > 30:  # ignore garbage matches
-        sections.append({
-            "section": section_no,
-            "title": title,
-            "law_text": body
-        })
-
-with open("ipc_sections.json", "w", encoding="utf-8") as f:
-    json.dump(sections, f, indent=2, ensure_ascii=False)
-
-print(f"✅ Extracted {len(sections)} IPC sections")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Gunicorn Configuration
+Loaded automatically by `gunicorn app:app` run from backend/. Threaded
+workers keep a streaming chat reply on one thread instead of a whole worker;
+each worker gets a thread per chat slot plus headroom for ordinary requests.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "gthread"
+
+# Chat slots are per worker (chat_proxy.MAX_CONCURRENCY); with fewer threads
+# than slots, streaming replies would starve every other route
+CHAT_MAX_CONCURRENCY = int(os.environ.get("CHAT_MAX_CONCURRENCY", "8"))
+threads = int(os.environ.get("GUNICORN_THREADS", str(CHAT_MAX_CONCURRENCY + 8)))
+
+# Above the chat deadline so a worker serving a long reply is not killed
+timeout = int(float(os.environ.get("CHAT_DEADLINE_SECONDS", "30"))) + 30
+keepalive = 5
@@ -0,0 +1,101 @@
+"""
+IPC Section Search
+Tokenized inverted index with BM25 ranking over the IPC sections, built once
+when ipc_sections.json is loaded
+"""
+
+import re
+from bisect import bisect_left
+from typing import Dict, List
+
+import numpy as np
+
+from bm25 import BM25Index, tokenize
+
+SECTION_RE = re.compile(r"^\d{1,3}[a-z]{0,2}$")
+SECTION_PREFIX_RE = re.compile(r"^(?:IPC)?(?:SECTION|SEC\.?|S\.)?")
+
+
+def normalize_section(section_no: str) -> str:
+    """Canonical section number, e.g. " section 304 b " -> "304B", "Sec. 498a IPC" -> "498A" """
+    key = re.sub(r"\s+", "", str(section_no)).upper()
+    key = SECTION_PREFIX_RE.sub("", key)
+    if key.endswith("IPC"):
+        key = key[:-3]
+    return key
+
+
+class IPCSectionIndex:
+    def __init__(self, sections: List[Dict], k1: float = 1.5, b: float = 0.75,
+                 title_boost: int = 2, max_prefix_terms: int = 50):
+        """Build the inverted index over section number, title and law text"""
+        self.sections = sections
+        self.max_prefix_terms = max_prefix_terms
+
+        # Precomputed lowercase corpus, used as a substring fallback
+        self.corpus = [
+            "\n".join((s.get("section", ""), s.get("title", ""), s.get("law_text", ""))).lower()
+            for s in sections
+        ]
+
+        # Normalized section number -> section; first occurrence wins on duplicates
+        self.by_section = {}
+        for sec in sections:
+            self.by_section.setdefault(normalize_section(sec.get("section", "")), sec)
+
+        # Sorted section numbers for exact / prefix matching ("498" -> 498, 498A)
+        self.section_keys = sorted(
+            (s.get("section", "").strip().lower(), i) for i, s in enumerate(sections)
+        )
+
+        # Title tokens are repeated so title matches weigh more
+        documents = (
+            tokenize(s.get("section", ""))
+            + tokenize(s.get("title", "")) * title_boost
+            + tokenize(s.get("law_text", ""))
+            for s in sections
+        )
+        self.bm25 = BM25Index(documents, k1=k1, b=b)
+        self.vocab = self.bm25.vocab
+
+    def get(self, section_no: str):
+        """O(1) lookup of a section by number, or None"""
+        return self.by_section.get(normalize_section(section_no))
+
+    def _section_matches(self, token: str):
+        """Indices of sections equal to, or starting with, a section-number token"""
+        exact, prefix = [], []
+        start = bisect_left(self.section_keys, (token,))
+        for key, i in self.section_keys[start:]:
+            if not key.startswith(token):
+                break
+            (exact if key == token else prefix).append(i)
+        return exact, prefix
+
+    def search(self, query: str, limit: int = 5) -> List[Dict]:
+        """Return the best matching sections for a free-text or section-number query"""
+        tokens = tokenize(query)
+        if not tokens or not self.sections:
+            return []
+
+        # Typeahead: the last token also matches as a prefix
+        terms = set(tokens[:-1])
+        terms.update(self.bm25.prefix_terms(tokens[-1], self.max_prefix_terms) or [tokens[-1]])
+        scores = self.bm25.scores(terms)
+
+        # Section numbers outrank text matches: exact first, then prefix matches
+        boost = scores.max() + 1
+        for token in tokens:
+            if SECTION_RE.match(token):
+                exact, prefix = self._section_matches(token)
+                scores[prefix] += boost
+                scores[exact] += 2 * boost
+
+        hits = np.flatnonzero(scores)
+        if hits.size == 0:
+            # Nothing tokenizes usefully (e.g. punctuation inside a word)
+            needle = query.lower()
+            return [s for s, text in zip(self.sections, self.corpus) if needle in text][:limit]
+
+        order = hits[np.argsort(-scores[hits], kind="stable")][:limit]
+        return [self.sections[i] for i in order]
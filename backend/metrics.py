@@ -0,0 +1,186 @@
+"""
+Request Metrics
+Per-route latency histograms, request and error counters, and internal spans,
+exported in the Prometheus text format on /metrics. Values are per process
+(each gunicorn worker keeps its own).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Seconds; the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the duration of the with-block, in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets + (float("inf"),), series[:-2] + [series[-1]]):
+                    bucket_labels = _format_labels(self.labelnames + ("le",), labels + (_format_value(bound),))
+                    lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+                label_text = _format_labels(self.labelnames, labels)
+                lines.append(f"{self.name}_sum{label_text} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{label_text} {series[-1]}")
+        return lines
+
+
+class CallbackMetric:
+    def __init__(self, name: str, help_text: str, metric_type: str,
+                 callback: Callable[[], Iterable[Tuple[Dict, float]]]):
+        """Values computed at scrape time; callback yields (labels, value) pairs"""
+        self.name = name
+        self.help_text = help_text
+        self.metric_type = metric_type
+        self.callback = callback
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        try:
+            samples = list(self.callback())
+        except Exception as e:
+            print(f"Error collecting metric {self.name}: {e}")
+            samples = []
+        for labels, value in samples:
+            lines.append(f"{self.name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            # Modules may be re-imported (e.g. by the dev reloader); keep the first
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name: str, help_text: str, metric_type: str, callback) -> CallbackMetric:
+        return self._register(CallbackMetric(name, help_text, metric_type, callback))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+SPAN_SECONDS = REGISTRY.histogram(
+    "span_duration_seconds", "Duration of internal operations", ("span",)
+)
+
+
+def span(name: str):
+    """Time an internal step: with span("supreme_court.encode"): ..."""
+    return SPAN_SECONDS.time(name)
+
+
+def init_app(app, registry: Registry = REGISTRY):
+    """Record latency, request count and errors for every request to app"""
+    from flask import g, request
+
+    latency = registry.histogram(
+        "http_request_duration_seconds", "Request latency by route", ("method", "route")
+    )
+    requests_total = registry.counter(
+        "http_requests_total", "Requests by route and status", ("method", "route", "status")
+    )
+    errors_total = registry.counter(
+        "http_request_errors_total", "Requests that ended in a 5xx by route", ("method", "route")
+    )
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("_metrics_start", None)
+        # The URL rule, not the raw path, keeps label cardinality bounded
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        if start is not None:
+            latency.observe(time.perf_counter() - start, request.method, route)
+        requests_total.inc(request.method, route, str(response.status_code))
+        if response.status_code >= 500:
+            errors_total.inc(request.method, route)
+        return response
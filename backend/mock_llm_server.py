@@ -0,0 +1,75 @@
+"""
+Mock LLM Server
+Local stand-in for the Gemini streamGenerateContent API, for exercising the
+chat proxy without an API key. Replies echo the last user message word by
+word, one SSE chunk per word.
+
+Usage:
+    python mock_llm_server.py --port 8081 --delay-ms 50
+    GEMINI_API_BASE=http://127.0.0.1:8081 GEMINI_API_KEY=test python app.py
+"""
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(delay_ms: float, status: int = 200):
+    class MockLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if status != 200 or ":streamGenerateContent" not in self.path:
+                error = json.dumps({"error": {"code": status, "message": "mock error"}}).encode("utf-8")
+                self.send_response(status if status != 200 else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(error)))
+                self.end_headers()
+                self.wfile.write(error)
+                return
+
+            contents = json.loads(body or b"{}").get("contents", [])
+            message = contents[-1]["parts"][0]["text"] if contents else ""
+            words = f"Mock reply to: {message}".split()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i, word in enumerate(words):
+                time.sleep(delay_ms / 1000)
+                chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": word + (" " if i < len(words) - 1 else "")}]}}]}
+                self._write_chunk(f"data: {json.dumps(chunk)}\r\n\r\n".encode("utf-8"))
+            self._write_chunk(b"")
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, format, *args):
+            pass  # one line per request would drown benchmark output
+
+    return MockLLMHandler
+
+
+def serve(port: int = 8081, delay_ms: float = 50, status: int = 200) -> ThreadingHTTPServer:
+    """Start the server (call serve_forever() on the result)"""
+    return ThreadingHTTPServer(("127.0.0.1", port), make_handler(delay_ms, status))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Gemini streaming API")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--delay-ms", type=float, default=50, help="delay before each streamed word")
+    parser.add_argument("--status", type=int, default=200, help="answer every request with this status")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.delay_ms, args.status)
+    print(f"✅ Mock LLM listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
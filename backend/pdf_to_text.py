@@ -1,17 +1,131 @@
+"""
+Bare Act PDF to Text
+Extracts pages in parallel across a process pool and streams them, in page
+order, straight to the output file. Works for any bare-act PDF (IPC, CrPC,
+Evidence Act, BNS, ...).
+
+Usage:
+    python pdf_to_text.py                                   # IPC defaults
+    python pdf_to_text.py data/crpc.pdf -o data/crpc.txt --workers 8
+    python pdf_to_text.py data/bns.pdf --pages 10-200 --resume
+"""
+
+import argparse
+import json
+import os
+from multiprocessing import Pool, cpu_count
+
 import pdfplumber
 
-pdf_path = "data\\THE-INDIAN-PENAL-CODE-1860.pdf"
-output_txt = "data\\ipc_full_text.txt"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PDF = os.path.join(BASE_DIR, "data", "THE-INDIAN-PENAL-CODE-1860.pdf")
+DEFAULT_OUTPUT = os.path.join(BASE_DIR, "data", "ipc_full_text.txt")
+
+# Each worker opens the PDF once; pdfplumber objects cannot be pickled
+_pdf = None
+
+
+def _open_pdf(pdf_path):
+    global _pdf
+    _pdf = pdfplumber.open(pdf_path)
+
+
+def _extract_page(page_no):
+    """Text of one 1-based page, or None if the page has no text layer"""
+    page = _pdf.pages[page_no - 1]
+    text = page.extract_text()
+    page.flush_cache()  # pages hold parsed layout objects; release them
+    return page_no, text
+
+
+def parse_pages(spec, total):
+    """'5-20' -> range(5, 21); None -> every page"""
+    if not spec:
+        return range(1, total + 1)
+    first, _, last = spec.partition("-")
+    first = int(first)
+    last = int(last) if last else total
+    if not 1 <= first <= last <= total:
+        raise ValueError(f"page range {spec} outside 1-{total}")
+    return range(first, last + 1)
+
+
+def _load_progress(progress_path, pdf_path):
+    if not os.path.exists(progress_path):
+        return None
+    with open(progress_path, "r", encoding="utf-8") as f:
+        progress = json.load(f)
+    return progress if progress.get("pdf") == os.path.abspath(pdf_path) else None
+
+
+def _save_progress(progress_path, pdf_path, last_page, offset):
+    with open(progress_path, "w", encoding="utf-8") as f:
+        json.dump({"pdf": os.path.abspath(pdf_path), "last_page": last_page, "offset": offset}, f)
+
+
+def extract(pdf_path, output_path, pages=None, workers=None, resume=False, chunksize=4):
+    """
+    Extract pages of pdf_path into output_path.
+
+    With resume=True, a previous interrupted run (recorded in
+    <output>.progress) continues after the last page it completed.
+    Returns the number of pages written in this run.
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        total = len(pdf.pages)
+    page_range = parse_pages(pages, total)
+
+    progress_path = output_path + ".progress"
+    progress = _load_progress(progress_path, pdf_path) if resume else None
+    if progress and not (os.path.exists(output_path) and os.path.getsize(output_path) >= progress["offset"]):
+        # The output was moved or cut short since the progress was saved
+        print(f"⚠️ {output_path} does not match {progress_path}, starting over")
+        os.remove(progress_path)
+        progress = None
+
+    if progress:
+        # Drop anything written after the last recorded page
+        out = open(output_path, "r+", encoding="utf-8")
+        out.seek(progress["offset"])
+        out.truncate()
+        page_range = range(max(page_range.start, progress["last_page"] + 1), page_range.stop)
+        print(f"Resuming after page {progress['last_page']}")
+    else:
+        out = open(output_path, "w", encoding="utf-8")
+
+    written = 0
+    workers = workers or cpu_count()
+    with out, Pool(workers, initializer=_open_pdf, initargs=(pdf_path,)) as pool:
+        # imap keeps page order while workers run ahead
+        for page_no, text in pool.imap(_extract_page, page_range, chunksize=chunksize):
+            if text:
+                out.write(text + "\n")
+            written += 1
+            if written % 25 == 0:
+                out.flush()
+                _save_progress(progress_path, pdf_path, page_no, out.tell())
+
+    if os.path.exists(progress_path):
+        os.remove(progress_path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract text from a bare-act PDF")
+    parser.add_argument("pdf", nargs="?", default=DEFAULT_PDF, help="input PDF")
+    parser.add_argument("-o", "--output", help="output text file (default: PDF name with .txt)")
+    parser.add_argument("--pages", help="1-based page range, e.g. 10-200 or 50-")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run")
+    args = parser.parse_args()
 
-all_text = ""
+    output = args.output
+    if output is None:
+        output = DEFAULT_OUTPUT if args.pdf == DEFAULT_PDF else os.path.splitext(args.pdf)[0] + ".txt"
 
-with pdfplumber.open(pdf_path) as pdf:
-    for page in pdf.pages:
-        text = page.extract_text()
-        if text:
-            all_text += text + "\n"
+    written = extract(args.pdf, output, pages=args.pages, workers=args.workers, resume=args.resume)
+    print(f"✅ {os.path.basename(args.pdf)} converted to text successfully ({written} pages)")
 
-with open(output_txt, "w", encoding="utf-8") as f:
-    f.write(all_text)
 
-print("✅ IPC PDF converted to text successfully")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Record Store
+Offset-indexed, memory-mapped file of JSON records: the corpus lives once on
+disk (shared by every worker through the page cache) and only the rows a
+search returns are decoded
+"""
+
+import json
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+
+@contextmanager
+def write_atomically(path: str) -> Iterator[str]:
+    """
+    Path of a new, uniquely named temp file next to path to write into. It
+    replaces path when the block succeeds and is removed if it fails, so
+    concurrent writers never share a temp file and readers (including ones
+    that memory-mapped the old file) only ever see a whole version.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".",
+                                    suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class RecordStore:
+    def __init__(self, path: str):
+        """Open the store written by RecordStore.write(path, ...)"""
+        self.path = path
+        # offsets[i]:offsets[i + 1] is the UTF-8 JSON of record i
+        self.offsets = np.load(self.offsets_path(path), mmap_mode='r')
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            # mmap cannot map an empty file
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @staticmethod
+    def offsets_path(path: str) -> str:
+        return path + ".idx.npy"
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        return os.path.exists(path) and os.path.exists(cls.offsets_path(path))
+
+    @classmethod
+    def write(cls, path: str, records: Iterable[Dict]) -> int:
+        """
+        Stream records into a new store at path and return how many were
+        written. The files are swapped in at the end, so an open store keeps
+        reading the previous version.
+        """
+        offsets = [0]
+        with write_atomically(path) as tmp_path, write_atomically(cls.offsets_path(path)) as tmp_offsets:
+            with open(tmp_path, 'wb') as f:
+                for record in records:
+                    data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                    f.write(data)
+                    offsets.append(offsets[-1] + len(data))
+            with open(tmp_offsets, 'wb') as f:
+                np.save(f, np.asarray(offsets, dtype='int64'))
+        return len(offsets) - 1
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> Dict:
+        if not 0 <= row < len(self):
+            raise IndexError(f"record {row} out of range")
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self._data[start:end])
+
+    def get_many(self, rows: Iterable[int]) -> List[Dict]:
+        return [self[row] for row in rows]
+
+    def __iter__(self) -> Iterator[Dict]:
+        for row in range(len(self)):
+            yield self[row]
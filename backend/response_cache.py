@@ -0,0 +1,75 @@
+"""
+Static Response Cache
+Serves endpoints whose payload never changes at runtime from pre-serialized
+JSON bytes with ETag / Last-Modified, answering conditional requests with 304
+"""
+
+import hashlib
+import os
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Optional
+
+from flask import Response, current_app, request
+
+
+class CachedJSON:
+    def __init__(self, view, source_path: Optional[str] = None):
+        """Wrap a view returning a JSON-serializable payload"""
+        self.view = view
+        self.source_path = source_path
+        self._lock = threading.Lock()
+        self._body = None
+        self._etag = None
+        self._last_modified = None
+
+    def _build(self, *args, **kwargs):
+        """Compute and serialize the payload once (on first hit)"""
+        payload = self.view(*args, **kwargs)
+        body = (current_app.json.dumps(payload) + "\n").encode("utf-8")
+
+        # Content hash and data file mtime are identical across workers
+        self._etag = hashlib.sha1(body).hexdigest()
+        if self.source_path and os.path.exists(self.source_path):
+            self._last_modified = datetime.fromtimestamp(os.path.getmtime(self.source_path), tz=timezone.utc)
+        else:
+            self._last_modified = datetime.now(timezone.utc)
+        self._body = body
+
+    def __call__(self, *args, **kwargs):
+        if self._body is None:
+            with self._lock:
+                if self._body is None:
+                    self._build(*args, **kwargs)
+
+        response = Response(self._body, mimetype="application/json")
+        response.set_etag(self._etag)
+        response.last_modified = self._last_modified
+        response.cache_control.public = True
+        response.cache_control.no_cache = True  # always revalidate, 304 is cheap
+        return response.make_conditional(request)
+
+    def invalidate(self):
+        """Drop the cached body so the next request recomputes it"""
+        with self._lock:
+            self._body = None
+
+
+def cached_json(source_path: Optional[str] = None):
+    """
+    Decorator for static read endpoints. The view returns a plain payload
+    (not a jsonify() response); source_path is the data file used for
+    Last-Modified.
+    """
+    def decorator(view):
+        cached = CachedJSON(view, source_path)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            return cached(*args, **kwargs)
+
+        wrapper.cache = cached
+        return wrapper
+
+    return decorator
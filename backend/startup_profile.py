@@ -0,0 +1,53 @@
+"""
+Startup Profile
+Records how long each import and dataset load takes while the app boots (and
+deferred loads after it), for the cold-start report in /api/health
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StartupProfile:
+    def __init__(self):
+        """Start the clock; create this before the imports to be measured"""
+        self.started = time.perf_counter()
+        self.steps = []
+        self.ready_ms = None
+
+    def _elapsed_ms(self, since: float) -> float:
+        return round((time.perf_counter() - since) * 1000, 1)
+
+    @contextmanager
+    def step(self, kind: str, name: str):
+        """Time one import ("import") or data load ("dataset")"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append({
+                "kind": kind,
+                "name": name,
+                "ms": self._elapsed_ms(start),
+                # Steps after boot were deferred to the first request that needed them
+                "deferred": self.ready_ms is not None,
+            })
+
+    def mark_ready(self):
+        """The app module has finished loading"""
+        self.ready_ms = self._elapsed_ms(self.started)
+
+    def report(self) -> Dict:
+        boot = [s for s in self.steps if not s["deferred"]]
+        return {
+            "boot_ms": self.ready_ms,
+            "imports_ms": round(sum(s["ms"] for s in boot if s["kind"] == "import"), 1),
+            "datasets_ms": round(sum(s["ms"] for s in boot if s["kind"] == "dataset"), 1),
+            "steps": list(self.steps),
+        }
+
+    def print_report(self):
+        print(f"Startup finished in {self.ready_ms} ms")
+        for s in sorted(self.steps, key=lambda s: -s["ms"]):
+            print(f"  {s['ms']:>8.1f} ms  {s['kind']:<8} {s['name']}")
@@ -3,168 +3,1386 @@ Supreme Court Semantic Search System
 Uses sentence-transformers and FAISS for retrieving relevant Supreme Court judgments
 """
 
+import hashlib
+import itertools
 import json
+import multiprocessing
 import numpy as np
 import pickle
 import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
 from pathlib import Path
 from sentence_transformers import SentenceTransformer
 import faiss
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterable, Iterator, Tuple
+
+from bm25 import BM25Index, tokenize
+from case_filters import CaseFilterIndex, normalize_filters
+from record_store import RecordStore, write_atomically
+from metrics import span
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds are not locked across processes
+    fcntl = None
+
+# Micro-batching of concurrent queries (max size 1 disables it)
+BATCH_MAX_SIZE = int(os.environ.get("SUPREME_COURT_BATCH_MAX_SIZE", "1"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("SUPREME_COURT_BATCH_MAX_WAIT_MS", "5"))
+
+# Query embedding / result caches (size 0 disables them)
+CACHE_SIZE = int(os.environ.get("SUPREME_COURT_CACHE_SIZE", "1024"))
+CACHE_TTL_SECONDS = float(os.environ.get("SUPREME_COURT_CACHE_TTL", "3600"))
+
+# FAISS index type: flat (exact), ivf_flat, hnsw or ivf_pq, with search-time knobs
+INDEX_TYPE = os.environ.get("SUPREME_COURT_INDEX_TYPE", "flat")
+INDEX_NPROBE = int(os.environ.get("SUPREME_COURT_NPROBE", "8"))
+INDEX_EF_SEARCH = int(os.environ.get("SUPREME_COURT_EF_SEARCH", "64"))
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+# Retrieval mode: hybrid (BM25 + FAISS, reciprocal rank fusion) or semantic only
+RETRIEVAL_MODE = os.environ.get("SUPREME_COURT_RETRIEVAL", "hybrid")
+RRF_K = 60
+
+# Statutory references: "Section 19", "s. 438", "u/s 302", "Article 21", "Art. 14"
+CITATION_RE = re.compile(r"\b(section|sec|u/s|s|article|art|order|rule)\s*\.?\s*(\d+[a-z]*)\b", re.IGNORECASE)
+CITATION_KINDS = {"sec": "section", "u/s": "section", "s": "section", "art": "article"}
+CITATION_FILLER = {"of", "the", "under", "act", "code", "penal", "constitution", "india", "indian", "and", "to", "read",
+                   "with", "r", "w"}
+# Short names of statutes, which name where a section lives rather than a topic
+CITATION_ACTS = {"ipc", "crpc", "cpc", "pmla", "ndps", "uapa", "pocso", "tada", "mcoca", "fema", "bns", "bnss",
+                 "bsa", "iea", "mva", "rti", "gst"}
+
+# Query/corpus encoder backend: torch (reference), torch_int8 (dynamic
+# quantization), onnx, or onnx_int8 (pre-quantized ONNX export of the model)
+ENCODER_BACKEND = os.environ.get("SUPREME_COURT_ENCODER", "torch")
+ENCODER_BACKENDS = ("torch", "torch_int8", "onnx", "onnx_int8")
+ONNX_INT8_FILE = os.environ.get("SUPREME_COURT_ONNX_INT8_FILE", "onnx/model_qint8_avx2.onnx")
+
+# On-disk dtype of the memory-mapped embedding store (float16 halves the file)
+EMBEDDINGS_DTYPE = os.environ.get("SUPREME_COURT_EMBEDDINGS_DTYPE", "float16")
+
+# Corpus build: texts per encode task, encoder processes (1 encodes in-process),
+# vectors per FAISS add, and how often (in tasks) progress is checkpointed
+BUILD_BATCH_SIZE = int(os.environ.get("SUPREME_COURT_BUILD_BATCH_SIZE", "64"))
+BUILD_WORKERS = int(os.environ.get("SUPREME_COURT_BUILD_WORKERS", "1"))
+INDEX_ADD_CHUNK = 65536
+CHECKPOINT_EVERY = 50
+
+# Index unit: question (one vector per case) or passage (overlapping word
+# windows of question + answer, aggregated back to one result per case)
+INDEX_UNIT = os.environ.get("SUPREME_COURT_INDEX_UNIT", "question")
+INDEX_UNITS = ("question", "passage")
+PASSAGE_WORDS = int(os.environ.get("SUPREME_COURT_PASSAGE_WORDS", "120"))
+PASSAGE_OVERLAP = int(os.environ.get("SUPREME_COURT_PASSAGE_OVERLAP", "30"))
+# Case score from its passage hits: max (best passage) or sum (of the top n)
+PASSAGE_AGGREGATION = os.environ.get("SUPREME_COURT_PASSAGE_AGGREGATION", "max")
+PASSAGE_AGGREGATIONS = ("max", "sum")
+PASSAGE_TOP_N = int(os.environ.get("SUPREME_COURT_PASSAGE_TOP_N", "3"))
+# Passage p of case c has FAISS ID c * MAX_PASSAGES + p, so ids // MAX_PASSAGES
+# gives the case; text past the last passage is not indexed
+MAX_PASSAGES = 256
+# Passage hits fetched per case wanted (several hits often share a case)
+PASSAGE_FANOUT = 4
+
+# Filtered searches over at most this many vectors are scored exactly instead
+# of walking the index; larger selections go to FAISS as an ID selector, with
+# nprobe / efSearch raised (up to FILTER_MAX_BOOST times) as selectivity drops
+FILTER_EXACT_MAX = int(os.environ.get("SUPREME_COURT_FILTER_EXACT_MAX", "4096"))
+FILTER_MAX_BOOST = 16
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """Stream judgment records from a JSON array or a JSON Lines (.jsonl) file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        
+        # Decode one array element at a time from a rolling buffer
+        decoder = json.JSONDecoder()
+        buffer, pos, started = "", 0, False
+        while True:
+            chunk = f.read(1 << 20)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            while True:
+                while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+                    pos += 1
+                if pos == len(buffer):
+                    break
+                if not started:
+                    if buffer[pos] != "[":
+                        raise ValueError(f"{path}: expected a JSON array of records")
+                    started = True
+                    pos += 1
+                    continue
+                if buffer[pos] == "]":
+                    return
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise
+                    break  # record continues in the next chunk
+                yield record
+                pos = end
+            if not chunk:
+                raise ValueError(f"{path}: unterminated JSON array")
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Encoder held by each build worker process
+_worker_encoder = None
+
+
+def split_passages(item: Dict, words: int = PASSAGE_WORDS, overlap: int = PASSAGE_OVERLAP,
+                   max_passages: int = MAX_PASSAGES) -> List[str]:
+    """
+    Overlapping windows of `words` words over question + answer. Always at
+    least one passage, so every case is in the index.
+    """
+    tokens = f"{item.get('question', '')} {item.get('answer', '')}".split()
+    step = max(1, words - overlap)
+    passages = []
+    for start in range(0, max(len(tokens), 1), step):
+        passages.append(" ".join(tokens[start:start + words]))
+        if start + words >= len(tokens) or len(passages) == max_passages:
+            break
+    return passages
+
+
+def expand_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, start + count) for each pair"""
+    starts = np.asarray(starts, dtype='int64')
+    counts = np.asarray(counts, dtype='int64')
+    ends = np.cumsum(counts)
+    return np.repeat(starts - (ends - counts), counts) + np.arange(ends[-1] if len(ends) else 0)
+
+
+def aggregate_hits(case_ids: np.ndarray, scores: np.ndarray, aggregation: str = "max",
+                   top_n: int = PASSAGE_TOP_N) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Collapse passage hits (best first, as FAISS returns them) to one entry per
+    case. Returns case IDs best first, their scores and the hit position of
+    each case's best passage. "sum" scores a case by the sum of its top_n
+    passage scores divided by top_n: it ranks like the sum but stays on the
+    cosine scale.
+    """
+    cases, first, inverse = np.unique(case_ids, return_index=True, return_inverse=True)
+    if aggregation == "max":
+        case_scores = scores[first]
+    else:
+        # Rank of each hit within its case: hits are already in score order
+        order = np.argsort(inverse, kind='stable')
+        group_start = np.searchsorted(inverse[order], inverse[order])
+        rank = np.arange(len(order)) - group_start
+        keep = order[rank < top_n]
+        case_scores = np.bincount(inverse[keep], weights=scores[keep], minlength=len(cases)) / top_n
+    ranking = np.lexsort((first, -case_scores))
+    return cases[ranking], case_scores[ranking], first[ranking]
+
+
+def _init_encode_worker(model_name: str, backend: str, threads: int):
+    global _worker_encoder
+    try:
+        import torch
+        torch.set_num_threads(threads)  # workers share the cores instead of each taking all
+    except ImportError:
+        pass
+    _worker_encoder = load_encoder(model_name, backend)
+
+
+def encode_texts(model, texts: List[str]) -> np.ndarray:
+    """Normalized float32 embeddings of one batch"""
+    vectors = model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def _encode_in_worker(texts: List[str]) -> np.ndarray:
+    return encode_texts(_worker_encoder, texts)
+
+
+def record_hash(item: Dict) -> str:
+    """Content hash of one judgment record"""
+    return hashlib.sha1(json.dumps(item, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def build_index(embeddings: np.ndarray, index_type: str = "flat", ids: np.ndarray = None,
+                nlist: int = None, hnsw_m: int = 32, pq_m: int = None) -> "faiss.Index":
+    """
+    Index factory for L2-normalized embeddings, all using inner product (cosine)
+    
+    Args:
+        embeddings: Normalized float32 matrix (n x d), also used for training
+        index_type: flat, ivf_flat, hnsw or ivf_pq
+        ids: int64 ID per row (default 0..n-1); every index type is ID-mapped
+             so records can be added and removed incrementally
+        nlist: IVF cells (default ~4*sqrt(n), capped so each cell gets training points)
+        hnsw_m: HNSW graph degree
+        pq_m: PQ sub-quantizers, must divide d (default: divisor of d closest to d/8)
+    """
+    n, dimension = embeddings.shape
+    metric = faiss.METRIC_INNER_PRODUCT
+
+    if index_type == "flat":
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+    elif index_type == "hnsw":
+        index = faiss.IndexIDMap2(faiss.IndexHNSWFlat(dimension, hnsw_m, metric))
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        if nlist is None:
+            nlist = int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n // 39))  # FAISS wants >= 39 training points per cell
+        quantizer = faiss.IndexFlatIP(dimension)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+            centroids = nlist
+        else:
+            if pq_m is None:
+                pq_m = min((m for m in range(1, dimension + 1) if dimension % m == 0),
+                           key=lambda m: abs(m - dimension // 8))
+            nbits = int(np.clip(np.log2(max(n // 39, 2)), 1, 8))  # 2**nbits codes need training points
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, nbits, metric)
+            centroids = max(nlist, 2 ** nbits)
+        # FAISS uses at most 256 points per centroid; train on a sample that size
+        sample = min(n, centroids * 256)
+        rows = np.sort(np.random.default_rng(0).choice(n, size=sample, replace=False))
+        index.train(np.ascontiguousarray(embeddings[rows], dtype='float32'))
+    else:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+    if ids is None:
+        ids = np.arange(n)
+    ids = np.asarray(ids, dtype='int64')
+    # Add in chunks: the store may be a float16 memmap, cast one chunk at a time
+    for start in range(0, n, INDEX_ADD_CHUNK):
+        chunk = np.ascontiguousarray(embeddings[start:start + INDEX_ADD_CHUNK], dtype='float32')
+        index.add_with_ids(chunk, ids[start:start + INDEX_ADD_CHUNK])
+    return index
+
+
+def write_index(index: "faiss.Index", path: str):
+    """Swap a new index file in whole: other workers may have the old one memory-mapped"""
+    with write_atomically(path) as tmp_path:
+        faiss.write_index(index, tmp_path)
+
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive lock on path (created if missing) across processes"""
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        yield
+
+
+def read_index(path: str) -> "faiss.Index":
+    """Memory-map the index read-only so workers share its pages via the OS cache"""
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        # Index types without mmap support are read into the heap
+        return faiss.read_index(path)
+
+
+def set_search_params(index: "faiss.Index", nprobe: int = INDEX_NPROBE, ef_search: int = INDEX_EF_SEARCH):
+    """Apply search-time recall/speed knobs to whatever index type was loaded"""
+    params = faiss.ParameterSpace()
+    for name, value in (("nprobe", nprobe), ("efSearch", ef_search)):
+        try:
+            params.set_index_parameter(index, name, value)
+        except RuntimeError:
+            pass  # not a parameter of this index type
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: lowercase words, punctuation and spacing ignored"""
+    return " ".join(re.findall(r"\w+", query.lower()))
+
+
+def legal_tokens(text: str) -> List[str]:
+    """Word tokens plus one token per statutory citation ("section_19", "article_21")"""
+    citations = [
+        f"{CITATION_KINDS.get(kind.lower(), kind.lower())}_{number.lower()}"
+        for kind, number in CITATION_RE.findall(text)
+    ]
+    return tokenize(text) + citations
+
+
+def is_citation_query(query: str) -> bool:
+    """
+    True for bare references like "Section 19 PMLA" or "Article 21" that BM25
+    answers alone: nothing is left once the citations, statute names and
+    filler words are removed. "dowry death Section 304B" still needs the
+    semantic ranking of its topic words.
+    """
+    if not CITATION_RE.search(query):
+        return False
+    # Numbers left over are further citations ("Sections 302 and 34")
+    words = [w for w in tokenize(CITATION_RE.sub(" ", query))
+             if w not in CITATION_FILLER and w not in CITATION_ACTS and not w[0].isdigit()]
+    return not words
+
+
+def load_encoder(model_name: str, backend: str = "torch") -> SentenceTransformer:
+    """Load the embedding model with the requested CPU inference backend"""
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "torch_int8":
+        import torch
+        model = SentenceTransformer(model_name, device="cpu")
+        # int8 weights for every Linear layer, activations quantized on the fly
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx")
+    if backend == "onnx_int8":
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": ONNX_INT8_FILE})
+    raise ValueError(f"Unknown encoder backend '{backend}', expected one of {ENCODER_BACKENDS}")
+
+
+def check_encoder(model_name: str, backend: str, texts: List[str], tolerance: float = 0.99) -> Dict:
+    """
+    Compare a backend's embeddings with the reference torch model. Vectors in
+    an index built by one backend stay usable with another only while the
+    per-text cosine similarity stays above the tolerance.
+    """
+    reference = load_encoder(model_name, "torch").encode(texts, show_progress_bar=False)
+    candidate = load_encoder(model_name, backend).encode(texts, show_progress_bar=False)
+    reference = np.ascontiguousarray(reference, dtype='float32')
+    candidate = np.ascontiguousarray(candidate, dtype='float32')
+    faiss.normalize_L2(reference)
+    faiss.normalize_L2(candidate)
+    
+    cosines = (reference * candidate).sum(axis=1)
+    return {
+        "backend": backend,
+        "texts": len(texts),
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "tolerance": tolerance,
+        "passed": bool(cosines.min() >= tolerance)
+    }
+
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with per-entry TTL and hit/miss counters"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl <= 0 or time.monotonic() - entry[1] < self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+
+class QueryBatcher:
+    """
+    Collects queries arriving from concurrent request threads within a short
+    window and runs them through one batched encode + FAISS search
+    """
+
+    def __init__(self, search_many, max_batch_size: int, max_wait_ms: float):
+        self.search_many = search_many
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        """Start the worker lazily so it is created after gunicorn forks"""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="sc-query-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, query: str, top_k: int) -> List[Dict]:
+        """Queue a query and block until its batch has been searched"""
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((query, top_k, future))
+        return future.result()
+
+    def _collect(self) -> List[Tuple]:
+        """Wait for one query, then gather more until the batch is full or the window closes"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Candidate depth (fusion, passage fan-out) grows with top_k, so a
+            # prefix of a deeper search is not what the query would get alone:
+            # search each top_k in the batch separately
+            groups = {}
+            for item in self._collect():
+                groups.setdefault(item[1], []).append(item)
+            for top_k, group in groups.items():
+                try:
+                    results = self.search_many([q for q, _, _ in group], top_k=top_k)
+                    for (_, _, future), result in zip(group, results):
+                        future.set_result(result)
+                except Exception as e:
+                    for _, _, future in group:
+                        future.set_exception(e)
 
 
 class SupremeCourtSearchEngine:
-    def __init__(self, json_path: str = None):
-        """Initialize the search engine with dataset and model"""
+    def __init__(self, json_path: str = None, batch_max_size: int = BATCH_MAX_SIZE,
+                 batch_max_wait_ms: float = BATCH_MAX_WAIT_MS, cache_size: int = CACHE_SIZE,
+                 cache_ttl: float = CACHE_TTL_SECONDS, index_type: str = INDEX_TYPE,
+                 nprobe: int = INDEX_NPROBE, ef_search: int = INDEX_EF_SEARCH,
+                 retrieval: str = RETRIEVAL_MODE, encoder_backend: str = ENCODER_BACKEND,
+                 data_dir: str = None, build_workers: int = BUILD_WORKERS,
+                 build_batch_size: int = BUILD_BATCH_SIZE, index_unit: str = INDEX_UNIT,
+                 passage_aggregation: str = PASSAGE_AGGREGATION):
+        """
+        Initialize the search engine with dataset and model. data_dir holds
+        the index files (default: backend/data, next to the dataset).
+        """
         # Use absolute path based on current file location
-        base_dir = Path(__file__).parent
-        self.json_path = json_path or str(base_dir / "data" / "supreme_court.json")
+        data_dir = Path(data_dir) if data_dir else Path(__file__).parent / "data"
+        self.json_path = json_path or str(data_dir / "supreme_court.json")
         self.model_name = "sentence-transformers/all-MiniLM-L6-v2"
-        self.index_path = str(base_dir / "data" / "supreme_court_index.faiss")
-        self.embeddings_path = str(base_dir / "data" / "supreme_court_embeddings.pkl")
+        self.index_path = str(data_dir / "supreme_court_index.faiss")
+        self.embeddings_path = str(data_dir / "supreme_court_embeddings.npy")
+        self.legacy_embeddings_path = str(data_dir / "supreme_court_embeddings.pkl")
+        self.index_meta_path = str(data_dir / "supreme_court_index.json")
+        self.vector_ids_path = str(data_dir / "supreme_court_vector_ids.npy")
+        # Held while the index files are built or updated, by any process
+        self.lock_path = str(data_dir / "supreme_court_index.lock")
+        # Memory-mapped copy of the dataset; search results read only their rows
+        self.records_path = str(data_dir / "supreme_court_records.bin")
+        self.records_meta_path = str(data_dir / "supreme_court_records.json")
+        
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.hybrid = retrieval == "hybrid"
+        if encoder_backend not in ENCODER_BACKENDS:
+            raise ValueError(f"Unknown encoder backend '{encoder_backend}', expected one of {ENCODER_BACKENDS}")
+        self.encoder_backend = encoder_backend
+        self.build_workers = max(1, build_workers)
+        self.build_batch_size = max(1, build_batch_size)
+        if index_unit not in INDEX_UNITS:
+            raise ValueError(f"Unknown index unit '{index_unit}', expected one of {INDEX_UNITS}")
+        if passage_aggregation not in PASSAGE_AGGREGATIONS:
+            raise ValueError(f"Unknown passage aggregation '{passage_aggregation}', expected one of {PASSAGE_AGGREGATIONS}")
+        self.index_unit = index_unit
+        self.passage_aggregation = passage_aggregation
+        # FAISS IDs per case: vector ID = case ID * id_stride + passage number
+        self.id_stride = MAX_PASSAGES if index_unit == "passage" else 1
+        self.bm25 = None
+        self.case_filters = None
         
         # Defer initialization
-        self.data = None
+        self.records = None
         self.model = None
         self.index = None
         self.embeddings = None
+        # Manifest state: content key and case ID of each row of self.records,
+        # FAISS ID of each row of self.embeddings (grouped by record, in record
+        # order: record r owns embeddings[vector_offsets[r]:vector_offsets[r + 1]])
+        self.record_keys = []
+        self.row_ids = np.zeros(0, dtype='int64')
+        self.row_of_id = {}
+        self.vector_ids = np.zeros(0, dtype='int64')
+        self.vector_offsets = np.zeros(1, dtype='int64')
+        self.next_id = 0
         self._initialized = False
+        self._init_lock = threading.Lock()
+        self._warmup_requested = False
+        self.state = "cold"  # cold -> initializing -> ready (or failed)
+        self.init_error = None
+        self.init_seconds = None
+
+        # Repeated questions skip the transformer (embedding) and FAISS (results)
+        self.embedding_cache = LRUCache(cache_size, cache_ttl)
+        self.result_cache = LRUCache(cache_size, cache_ttl)
+
+        self.batcher = None
+        if batch_max_size > 1:
+            self.batcher = QueryBatcher(self.search_many, batch_max_size, batch_max_wait_ms)
     
     def _ensure_initialized(self):
         """Lazy initialization - only load when first search is performed"""
         if self._initialized:
             return
         
+        # Concurrent first requests wait here so only one build happens
+        with self._init_lock:
+            if self._initialized:
+                return
+            
+            self.state = "initializing"
+            start = time.perf_counter()
+            try:
+                self._initialize()
+            except Exception as e:
+                self.state = "failed"
+                self.init_error = str(e)
+                raise
+            
+            self.init_seconds = round(time.perf_counter() - start, 2)
+            self.init_error = None
+            self.state = "ready"
+            self._initialized = True
+        print("Supreme Court Search Engine ready!")
+    
+    def _initialize(self):
+        """Load dataset, model and index, then run one encode so the first query is hot"""
         print("Initializing Supreme Court Search Engine...")
         
-        # Load dataset
-        self.data = self._load_dataset()
-        
         # Initialize model
         print("Loading embedding model...")
-        self.model = SentenceTransformer(self.model_name)
+        self.model = load_encoder(self.model_name, self.encoder_backend)
+        
+        # Workers cold-starting on one data_dir take turns: the first builds
+        # the files, the others wait here and then find its manifest and load them
+        with file_lock(self.lock_path):
+            self._load_or_build()
+        
+        self._build_lexical_index()
         
-        # Load or create index
-        if os.path.exists(self.index_path) and os.path.exists(self.embeddings_path):
+        # Dummy encode pays one-off costs (lazy kernels, allocator) before real traffic
+        self.model.encode(["warm up"], show_progress_bar=False)
+    
+    def _load_or_build(self):
+        """Open the record store and index files, building or updating whatever is missing or stale"""
+        self.records, keys = self._load_dataset()
+        
+        # Embeddings pickled by older versions are converted once
+        if os.path.exists(self.legacy_embeddings_path) and not os.path.exists(self.embeddings_path):
+            self._migrate_pickled_embeddings()
+        
+        # Load or create index (indexes saved without a manifest are rebuilt once)
+        manifest = self._load_manifest()
+        if manifest and manifest.get("index_unit", "question") != self.unit_signature():
+            print(f"Index unit changed to {self.unit_signature()}, re-encoding the corpus...")
+            manifest = {}
+        if os.path.exists(self.index_path) and os.path.exists(self.embeddings_path) and "records" in manifest:
             print("Loading existing FAISS index...")
-            self.index = faiss.read_index(self.index_path)
-            with open(self.embeddings_path, 'rb') as f:
-                self.embeddings = pickle.load(f)
+            self.index = read_index(self.index_path)
+            set_search_params(self.index, self.nprobe, self.ef_search)
+            self.embeddings = np.load(self.embeddings_path, mmap_mode='r')
+            self._set_rows([key for key, _ in manifest["records"]], [i for _, i in manifest["records"]])
+            # Indexes from before passage support have one vector per record
+            self._set_vectors(np.load(self.vector_ids_path) if os.path.exists(self.vector_ids_path)
+                              else self.row_ids)
+            self.next_id = manifest.get("next_id", len(self.row_ids))
+            
+            # Stored embeddings are enough to switch index types without re-encoding
+            if manifest.get("index_type", "flat") != self.index_type:
+                print(f"Rebuilding FAISS index as {self.index_type}...")
+                self._build_and_save_index()
+            
+            # Index whatever changed in the JSON since the manifest was written
+            if keys != self.record_keys:
+                print("Dataset changed since last index build, updating incrementally...")
+                print(self._apply_updates(keys))
         else:
             print("Creating new FAISS index...")
-            self._create_index()
+            self._create_index(keys)
+    
+    def start_warmup(self) -> threading.Thread:
+        """Initialize in a background thread so requests never pay the cold start"""
+        self._warmup_requested = True
         
-        self._initialized = True
-        print("Supreme Court Search Engine ready!")
+        def warmup():
+            try:
+                self._ensure_initialized()
+            except Exception as e:
+                print(f"Supreme Court Search Engine warm-up failed: {e}")
+        
+        thread = threading.Thread(target=warmup, name="sc-warmup", daemon=True)
+        thread.start()
+        return thread
+    
+    def status(self) -> Dict:
+        """Readiness state for health checks"""
+        return {
+            "state": self.state,
+            "ready": self._initialized,
+            "index_type": self.index_type,
+            "index_unit": self.index_unit,
+            "encoder": self.encoder_backend,
+            "vectors": int(self.index.ntotal) if self._initialized else 0,
+            "filters": self.case_filters.stats() if self._initialized else None,
+            "init_seconds": self.init_seconds,
+            "error": self.init_error
+        }
+    
+    def _after_fork(self):
+        """A forked worker does not inherit the warm-up thread; restart it if needed"""
+        self._init_lock = threading.Lock()
+        if not self._initialized:
+            self.state = "cold"
+            if self._warmup_requested:
+                self.start_warmup()
+    
+    def _load_dataset(self) -> Tuple[RecordStore, List[str]]:
+        """
+        Open the record store of the Supreme Court dataset (JSON array or JSON
+        Lines) and the content key of each record. The store is rebuilt, in
+        one streaming pass, only when the dataset file has changed.
+        """
+        meta = {}
+        if os.path.exists(self.records_meta_path) and RecordStore.exists(self.records_path):
+            with open(self.records_meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        
+        source = None
+        if os.path.exists(self.json_path) or not meta:
+            stat = os.stat(self.json_path)
+            source = {"path": os.path.abspath(self.json_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        
+        if source is None or meta.get("source") == source:
+            keys = meta["keys"]
+        else:
+            keys = []
+            seen = {}
+            
+            def keyed(records):
+                # Content hash per record, suffixed with its occurrence so duplicates stay distinct
+                for item in records:
+                    digest = record_hash(item)
+                    seen[digest] = seen.get(digest, 0) + 1
+                    keys.append(f"{digest}:{seen[digest]}")
+                    yield item
+            
+            RecordStore.write(self.records_path, keyed(iter_records(self.json_path)))
+            with write_atomically(self.records_meta_path) as tmp_path:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({"source": source, "keys": keys}, f)
+        
+        records = RecordStore(self.records_path)
+        print(f"Loaded {len(records)} Supreme Court cases")
+        return records, keys
     
-    def _load_dataset(self) -> List[Dict]:
-        """Load Supreme Court dataset from JSON"""
-        with open(self.json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        print(f"Loaded {len(data)} Supreme Court cases")
-        return data
+    def unit_signature(self) -> str:
+        """What one vector embeds; stored vectors are reusable only for the same signature"""
+        if self.index_unit == "passage":
+            return f"passage:{PASSAGE_WORDS}:{PASSAGE_OVERLAP}"
+        return "question"
     
-    def _create_index(self):
+    def unit_texts(self, item: Dict) -> List[str]:
+        """Texts embedded for one record: its question, or its passages"""
+        if self.index_unit == "passage":
+            return split_passages(item)
+        return [item['question']]
+    
+    def _create_index(self, keys: List[str]):
         """Generate embeddings and create FAISS index"""
-        # Extract questions for embedding
-        questions = [item['question'] for item in self.data]
+        self._set_rows(keys, np.arange(len(keys)))
+        counts = np.fromiter((len(self.unit_texts(item)) for item in self.records), dtype='int64',
+                             count=len(keys)) if self.id_stride > 1 else np.ones(len(keys), dtype='int64')
+        self._set_vectors(self.vector_ids_for(self.row_ids, counts))
+        print(f"Generating embeddings for {len(self.vector_ids)} {self.index_unit}s of {len(keys)} cases...")
+        self._build_embeddings(keys, (text for item in self.records for text in self.unit_texts(item)),
+                               len(self.vector_ids))
+        self.next_id = len(keys)
         
-        print(f"Generating embeddings for {len(questions)} questions...")
-        # Generate embeddings in batches for efficiency
-        batch_size = 32
-        all_embeddings = []
+        # Build and save the configured index type from the memory-mapped store
+        self.embeddings = np.load(self.embeddings_path, mmap_mode='r')
+        self._build_and_save_index()
+    
+    def _encode_batches(self, texts: Iterable[str]) -> Iterator[np.ndarray]:
+        """
+        Normalized float32 embeddings, one array per build batch, in input
+        order. With build_workers > 1 the batches are encoded by a process pool.
+        """
+        batches = batched(texts, self.build_batch_size)
+        if self.build_workers == 1:
+            for batch in batches:
+                yield encode_texts(self.model, batch)
+            return
         
-        for i in range(0, len(questions), batch_size):
-            batch = questions[i:i+batch_size]
-            embeddings = self.model.encode(batch, show_progress_bar=True)
-            all_embeddings.append(embeddings)
+        # spawn: forking a process that has loaded torch can deadlock
+        threads = max(1, (os.cpu_count() or 1) // self.build_workers)
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(self.build_workers, initializer=_init_encode_worker,
+                          initargs=(self.model_name, self.encoder_backend, threads)) as pool:
+            # imap keeps order (rows are written in sequence) while workers run ahead
+            yield from pool.imap(_encode_in_worker, batches)
+    
+    def _encode_corpus(self, texts: List[str]) -> np.ndarray:
+        """Encode corpus texts into one preallocated normalized float32 matrix"""
+        embeddings = np.empty((len(texts), self.model.get_sentence_embedding_dimension()), dtype='float32')
+        row = 0
+        for vectors in self._encode_batches(texts):
+            embeddings[row:row + len(vectors)] = vectors
+            row += len(vectors)
+        return embeddings
+    
+    def _build_embeddings(self, keys: List[str], texts: Iterable[str], count: int):
+        """
+        Encode the count corpus texts straight into the on-disk embedding
+        store, which is preallocated and written through a memmap. Progress is
+        checkpointed, so an interrupted build of the same records resumes where
+        it stopped.
+        """
+        dimension = self.model.get_sentence_embedding_dimension()
+        checkpoint_path = self.embeddings_path + ".checkpoint.json"
+        corpus_hash = hashlib.sha1("\n".join([self.unit_signature()] + keys).encode("utf-8")).hexdigest()
         
-        # Concatenate all embeddings
-        self.embeddings = np.vstack(all_embeddings).astype('float32')
+        done = 0
+        checkpoint = {}
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        # The checkpoint names its partial store (a unique file per build;
+        # checkpoints from before that used one fixed name)
+        partial_name = checkpoint.get("partial", os.path.basename(self.embeddings_path) + ".partial.npy")
+        partial_path = os.path.join(os.path.dirname(self.embeddings_path), partial_name)
+        if (checkpoint.get("corpus") == corpus_hash and checkpoint.get("dtype") == EMBEDDINGS_DTYPE
+                and os.path.isfile(partial_path)):
+            store = np.load(partial_path, mmap_mode='r+')
+            done = checkpoint["done"]
+            print(f"Resuming embedding build at row {done} of {count}")
+        else:
+            if os.path.isfile(partial_path):
+                os.remove(partial_path)  # left by an interrupted build of other records
+            fd, partial_path = tempfile.mkstemp(dir=os.path.dirname(self.embeddings_path),
+                                                prefix=os.path.basename(self.embeddings_path) + ".",
+                                                suffix=".partial.npy")
+            os.close(fd)
+            store = np.lib.format.open_memmap(partial_path, mode='w+', dtype=EMBEDDINGS_DTYPE,
+                                              shape=(count, dimension))
         
-        # Create FAISS index
-        dimension = self.embeddings.shape[1]
-        self.index = faiss.IndexFlatIP(dimension)  # Inner product (cosine similarity)
+        def save_checkpoint(rows_done):
+            store.flush()
+            with write_atomically(checkpoint_path) as tmp_path:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({"corpus": corpus_hash, "dtype": EMBEDDINGS_DTYPE, "rows": count, "done": rows_done,
+                               "partial": os.path.basename(partial_path)}, f)
         
-        # Normalize embeddings for cosine similarity
-        faiss.normalize_L2(self.embeddings)
+        # Checkpoint at once so the partial store is never left unreferenced
+        if not done:
+            save_checkpoint(0)
         
-        # Add to index
-        self.index.add(self.embeddings)
+        # Skip the rows a previous run finished
+        texts = iter(texts)
+        for _ in range(done):
+            next(texts)
         
-        # Save index and embeddings
-        faiss.write_index(self.index, self.index_path)
-        with open(self.embeddings_path, 'wb') as f:
-            pickle.dump(self.embeddings, f)
+        start = time.perf_counter()
+        row = done
+        for n_batches, vectors in enumerate(self._encode_batches(texts), 1):
+            store[row:row + len(vectors)] = vectors
+            row += len(vectors)
+            if n_batches % CHECKPOINT_EVERY == 0:
+                save_checkpoint(row)
+                rate = (row - done) / (time.perf_counter() - start)
+                print(f"  encoded {row}/{count} ({rate:.0f}/s)")
         
-        print(f"Index created with {self.index.ntotal} vectors")
+        if row != count:
+            raise ValueError(f"expected {count} texts to encode, got {row}")
+        store.flush()
+        del store
+        os.replace(partial_path, self.embeddings_path)
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+    
+    def _set_rows(self, keys: List[str], ids):
+        """Record which case ID belongs to which row"""
+        self.record_keys = list(keys)
+        self.row_ids = np.asarray(ids, dtype='int64')
+        self.row_of_id = {int(i): row for row, i in enumerate(self.row_ids)}
+    
+    def vector_ids_for(self, case_ids: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """FAISS IDs of counts[i] consecutive vectors (passages) of each case"""
+        starts = np.asarray(case_ids, dtype='int64') * self.id_stride
+        return expand_ranges(starts, counts)
+    
+    def _set_vectors(self, vector_ids):
+        """Record the FAISS ID of each embedding row and where each record's rows start"""
+        self.vector_ids = np.asarray(vector_ids, dtype='int64')
+        cases = self.vector_ids // self.id_stride
+        starts = np.flatnonzero(np.diff(cases)) + 1
+        bounds = ([0], starts, [len(cases)]) if len(cases) else ([0],)
+        self.vector_offsets = np.concatenate(bounds).astype('int64')
+    
+    def _load_manifest(self) -> Dict:
+        if not os.path.exists(self.index_meta_path):
+            return {}
+        with open(self.index_meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
     
-    def search(self, query: str, top_k: int = 5) -> List[Dict]:
+    def _save_manifest(self):
+        """Persist index type and the key -> ID mapping so restarts know what is indexed"""
+        with write_atomically(self.vector_ids_path) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, self.vector_ids)
+        
+        manifest = {
+            "index_type": self.index_type,
+            "index_unit": self.unit_signature(),
+            "ntotal": int(self.index.ntotal),
+            "next_id": int(self.next_id),
+            "records": [[key, int(i)] for key, i in zip(self.record_keys, self.row_ids)]
+        }
+        with write_atomically(self.index_meta_path) as tmp_path:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+    
+    def _apply_updates(self, keys: List[str]) -> Dict:
+        """
+        Bring the index in line with self.records (whose record keys are given):
+        embed only new or changed records, remove vanished ones by ID
+        """
+        old_rows = {key: row for row, key in enumerate(self.record_keys)}
+        new_key_set = set(keys)
+        removed_ids = np.array([i for key, i in zip(self.record_keys, self.row_ids) if key not in new_key_set],
+                               dtype='int64')
+        kept = [(row, old_rows[key]) for row, key in enumerate(keys) if key in old_rows]
+        added = [row for row, key in enumerate(keys) if key not in old_rows]
+        
+        # Embeddings stay grouped by record in record order: reuse the stored
+        # vectors of kept records, encode only the new ones
+        ids = np.empty(len(keys), dtype='int64')
+        counts = np.empty(len(keys), dtype='int64')
+        old_counts = np.diff(self.vector_offsets)
+        if kept:
+            new_pos, old_pos = (np.array(c) for c in zip(*kept))
+            ids[new_pos] = self.row_ids[old_pos]
+            counts[new_pos] = old_counts[old_pos]
+        if added:
+            added_texts = [self.unit_texts(self.records[row]) for row in added]
+            new_vectors = self._encode_corpus([text for texts in added_texts for text in texts])
+            ids[added] = np.arange(self.next_id, self.next_id + len(added), dtype='int64')
+            counts[added] = [len(texts) for texts in added_texts]
+            new_vector_ids = self.vector_ids_for(ids[added], counts[added])
+            self.next_id += len(added)
+        
+        offsets = np.concatenate(([0], np.cumsum(counts))).astype('int64')
+        embeddings = np.empty((offsets[-1], self.embeddings.shape[1]), dtype='float32')
+        if kept:
+            embeddings[expand_ranges(offsets[new_pos], counts[new_pos])] = \
+                self.embeddings[expand_ranges(self.vector_offsets[old_pos], counts[new_pos])]
+        if added:
+            embeddings[expand_ranges(offsets[added], counts[added])] = new_vectors
+        removed_vector_ids = self.vector_ids[np.isin(self.vector_ids // self.id_stride, removed_ids)]
+        
+        # The served index may be a read-only mmap; modify a writable copy
+        index = faiss.read_index(self.index_path)
+        try:
+            if len(removed_vector_ids):
+                index.remove_ids(removed_vector_ids)
+            if added:
+                index.add_with_ids(new_vectors, new_vector_ids)
+        except RuntimeError:
+            index = None  # e.g. HNSW cannot remove vectors
+        
+        self._save_embeddings(embeddings)
+        self.embeddings = np.load(self.embeddings_path, mmap_mode='r')
+        self._set_rows(keys, ids)
+        self._set_vectors(self.vector_ids_for(ids, counts))
+        if index is None:
+            self._build_and_save_index()
+        else:
+            set_search_params(index, self.nprobe, self.ef_search)
+            write_index(index, self.index_path)
+            self.index = index
+            self._save_manifest()
+        
+        # Cached results may reference removed records
+        self.result_cache.clear()
+        
+        return {"added": len(added), "removed": len(removed_ids), "unchanged": len(kept)}
+    
+    def update_index(self) -> Dict:
+        """
+        Incremental ingestion: reload the JSON and index only new or changed
+        records instead of re-embedding the whole corpus
+        
+        Returns:
+            Counts of added, removed and unchanged records
+        """
+        self._ensure_initialized()
+        with self._init_lock, file_lock(self.lock_path):
+            self.records, keys = self._load_dataset()
+            summary = self._apply_updates(keys)
+            self._build_lexical_index()
+        print(f"Index updated: {summary}")
+        return summary
+    
+    def _build_lexical_index(self):
+        """
+        Case metadata filters, and BM25 over case name, question and answer
+        for the hybrid retriever
+        """
+        self.case_filters = CaseFilterIndex(self.records)
+        if not self.hybrid:
+            return
+        self.bm25 = BM25Index(
+            legal_tokens(" ".join((item.get("case_name", ""), item.get("question", ""), item.get("answer", ""))))
+            for item in self.records
+        )
+        print(f"Lexical index built with {len(self.bm25.vocab)} terms")
+    
+    def _save_embeddings(self, embeddings: np.ndarray):
+        """Write embeddings as a raw .npy file that loads with np.load(mmap_mode='r')"""
+        with write_atomically(self.embeddings_path) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.asarray(embeddings, dtype=EMBEDDINGS_DTYPE))
+    
+    def _migrate_pickled_embeddings(self):
+        """Convert supreme_court_embeddings.pkl into the memory-mapped .npy store"""
+        print("Converting pickled embeddings to .npy...")
+        with open(self.legacy_embeddings_path, 'rb') as f:
+            self._save_embeddings(pickle.load(f))
+        os.remove(self.legacy_embeddings_path)
+    
+    def _build_and_save_index(self):
+        """Build the configured index type from self.embeddings and persist it"""
+        self.index = build_index(self.embeddings, self.index_type, ids=self.vector_ids)
+        set_search_params(self.index, self.nprobe, self.ef_search)
+        
+        write_index(self.index, self.index_path)
+        self._save_manifest()
+        
+        print(f"Index created with {self.index.ntotal} vectors ({self.index_type})")
+    
+    def recall_report(self, k: int = 10, sample: int = 1000, seed: int = 0) -> Dict:
+        """
+        Measure recall@k of the configured index against exact flat search,
+        using a sample of the stored embeddings as queries
+        """
+        self._ensure_initialized()
+        
+        rng = np.random.default_rng(seed)
+        n = len(self.embeddings)
+        queries = np.ascontiguousarray(self.embeddings[rng.choice(n, size=min(sample, n), replace=False)], dtype='float32')
+        k = min(k, n)
+        
+        flat = build_index(self.embeddings, "flat", ids=self.vector_ids)
+        start = time.perf_counter()
+        _, expected = flat.search(queries, k)
+        flat_ms = (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        _, found = self.index.search(queries, k)
+        index_ms = (time.perf_counter() - start) * 1000
+        
+        hits = sum(len(set(e) & set(f)) for e, f in zip(expected, found))
+        return {
+            "index_type": self.index_type,
+            "k": k,
+            "queries": len(queries),
+            f"recall@{k}": hits / (k * len(queries)),
+            "flat_search_ms": round(flat_ms, 2),
+            "index_search_ms": round(index_ms, 2)
+        }
+    
+    def search(self, query: str, top_k: int = 5, filters: Dict = None) -> List[Dict]:
         """
         Perform semantic search on Supreme Court dataset
         
         Args:
             query: User's legal question
             top_k: Number of results to return (default 5)
+            filters: Optional date_from / date_to / case_name / bench restrictions
             
         Returns:
             List of dictionaries containing search results with confidence scores
         """
+        # Micro-batches share one FAISS search, so only unfiltered queries join them
+        if self.batcher is not None and not filters:
+            return self.batcher.submit(query, top_k)
+        return self.search_many([query], top_k=top_k, filters=filters)[0]
+    
+    def search_many(self, queries: List[str], top_k: int = 5, filters: Dict = None) -> List[List[Dict]]:
+        """
+        Search several queries with a single encode and a single FAISS search
+        
+        Args:
+            queries: List of legal questions
+            top_k: Number of results to return per query
+            filters: Optional date_from / date_to / case_name / bench
+                     restrictions (see case_filters.py), applied to every query
+            
+        Returns:
+            One result list per query, in input order
+        """
         # Ensure engine is initialized
         self._ensure_initialized()
         
-        # Generate query embedding
-        query_embedding = self.model.encode([query], show_progress_bar=False)
-        query_embedding = query_embedding.astype('float32')
+        if not queries:
+            return []
+        
+        filters = normalize_filters(filters)
+        # Rows the filters allow (None: all), selected before any search runs
+        allowed = self.case_filters.rows(filters) if filters else None
+        if allowed is not None and not len(allowed):
+            return [[] for _ in queries]
+        filter_key = tuple(sorted(filters.items()))
+        
+        keys = [normalize_query(q) for q in queries]
+        results = [self.result_cache.get((key, top_k, filter_key)) for key in keys]
+        pending = [i for i, cached in enumerate(results) if cached is None]
+        if not pending:
+            return [list(cached) for cached in results]
+        
+        # Pure citations ("Section 19 PMLA") skip the transformer entirely
+        semantic = []
+        for i in pending:
+            if self.hybrid and is_citation_query(queries[i]):
+                with span("supreme_court.lexical"):
+                    results[i] = self._lexical_results(queries[i], top_k, allowed)
+            else:
+                semantic.append(i)
+        
+        if semantic:
+            query_embeddings = self._embed_queries([queries[i] for i in semantic], [keys[i] for i in semantic])
+            
+            # Search all rows at once; hybrid fusion needs a deeper candidate list,
+            # and passage hits are fetched deeper still as several share a case
+            depth = max(4 * top_k, 20) if self.hybrid else top_k
+            fetch = depth * PASSAGE_FANOUT if self.id_stride > 1 else depth
+            with span("supreme_court.faiss_search"):
+                scores, ids = self._search_vectors(query_embeddings, fetch, allowed)
+            
+            for j, i in enumerate(semantic):
+                rows, sims, passages = self._ids_to_rows(ids[j], scores[j])
+                if self.hybrid:
+                    with span("supreme_court.fusion"):
+                        rows, sims, passages = self._fuse(queries[i], query_embeddings[j], rows, sims, passages,
+                                                          depth, allowed)
+                with span("supreme_court.result_assembly"):
+                    results[i] = self._build_results(rows[:top_k], sims[:top_k], passages[:top_k])
+        
+        for i in pending:
+            self.result_cache.put((keys[i], top_k, filter_key), results[i])
+        
+        return [list(result) for result in results]
+    
+    def _embed_queries(self, queries: List[str], keys: List[str]) -> np.ndarray:
+        """Normalized query embeddings, reusing cached ones and encoding the rest as one matrix"""
+        embeddings = {}
+        to_encode = []
+        for query, key in zip(queries, keys):
+            if key in embeddings:
+                continue
+            cached = self.embedding_cache.get(key)
+            if cached is not None:
+                embeddings[key] = cached
+            else:
+                embeddings[key] = None
+                to_encode.append((query, key))
+        
+        if to_encode:
+            with span("supreme_court.encode"):
+                encoded = self.model.encode([query for query, _ in to_encode], show_progress_bar=False)
+            encoded = np.ascontiguousarray(encoded, dtype='float32')
+            
+            # Normalize for cosine similarity
+            faiss.normalize_L2(encoded)
+            
+            for (_, key), vector in zip(to_encode, encoded):
+                embeddings[key] = vector
+                self.embedding_cache.put(key, vector)
+        
+        return np.vstack([embeddings[key] for key in keys])
+    
+    def _search_vectors(self, query_embeddings: np.ndarray, k: int,
+                        rows: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        FAISS search restricted to the vectors of the given rows. Small
+        selections are scored exactly; larger ones pass the index an ID
+        selector so filtered-out cases never take a slot of the k.
+        """
+        if rows is None:
+            return self.index.search(query_embeddings, k)
+        
+        positions = expand_ranges(self.vector_offsets[rows], np.diff(self.vector_offsets)[rows])
+        if len(positions) <= FILTER_EXACT_MAX:
+            cosines = query_embeddings @ np.asarray(self.embeddings[positions], dtype='float32').T
+            found = min(k, len(positions))
+            top = np.argpartition(-cosines, found - 1, axis=1)[:, :found]
+            top = np.take_along_axis(top, np.argsort(-np.take_along_axis(cosines, top, axis=1), axis=1), axis=1)
+            scores = np.full((len(query_embeddings), k), -np.inf, dtype='float32')
+            ids = np.full((len(query_embeddings), k), -1, dtype='int64')
+            scores[:, :found] = np.take_along_axis(cosines, top, axis=1)
+            ids[:, :found] = self.vector_ids[positions][top]
+            return scores, ids
+        
+        selector = faiss.IDSelectorBatch(self.vector_ids[positions])
+        # A selective filter leaves fewer matches per probed cell / graph hop
+        boost = min(len(self.vector_ids) / len(positions), FILTER_MAX_BOOST)
+        if self.index_type in ("ivf_flat", "ivf_pq"):
+            nlist = faiss.extract_index_ivf(self.index).nlist
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=min(nlist, int(np.ceil(self.nprobe * boost))))
+        elif self.index_type == "hnsw":
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=max(k, int(np.ceil(self.ef_search * boost))))
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        return self.index.search(query_embeddings, k, params=params)
+    
+    def _ids_to_rows(self, ids, scores) -> Tuple[List[int], List[float], List[int]]:
+        """
+        Map one row of FAISS output to data rows, dropping -1 padding. Passage
+        hits are aggregated to one row per case; also returns the number of
+        each row's best-matching passage.
+        """
+        valid = ids >= 0
+        ids, scores = ids[valid], scores[valid]
+        if self.id_stride > 1:
+            cases, scores, best = aggregate_hits(ids // self.id_stride, scores, self.passage_aggregation)
+            passages = ids[best] % self.id_stride
+        else:
+            cases, passages = ids, np.zeros(len(ids), dtype='int64')
+        
+        rows, sims, best_passages = [], [], []
+        for case, score, passage in zip(cases.tolist(), scores.tolist(), passages.tolist()):
+            row = self.row_of_id.get(case)
+            if row is not None:
+                rows.append(row)
+                sims.append(score)
+                best_passages.append(passage)
+        return rows, sims, best_passages
+    
+    def _score_rows(self, rows: List[int], query_embedding: np.ndarray) -> Tuple[List[float], List[int]]:
+        """Score rows FAISS did not return, aggregating their passages like _ids_to_rows"""
+        counts = np.diff(self.vector_offsets)[rows]
+        positions = expand_ranges(self.vector_offsets[rows], counts)
+        cosines = np.asarray(self.embeddings[positions], dtype='float32') @ query_embedding
         
-        # Normalize for cosine similarity
-        faiss.normalize_L2(query_embedding)
+        scores, passages = [], []
+        start = 0
+        for count in counts.tolist():
+            row_cosines = cosines[start:start + count]
+            start += count
+            passages.append(int(np.argmax(row_cosines)))
+            if self.passage_aggregation == "sum" and self.id_stride > 1:
+                scores.append(float(np.sort(row_cosines)[::-1][:PASSAGE_TOP_N].sum() / PASSAGE_TOP_N))
+            else:
+                scores.append(float(row_cosines[passages[-1]]))
+        return scores, passages
+    
+    def _fuse(self, query: str, query_embedding: np.ndarray, rows: List[int], sims: List[float],
+              passages: List[int], depth: int,
+              allowed: np.ndarray = None) -> Tuple[List[int], List[float], List[int]]:
+        """
+        Reciprocal rank fusion of the semantic candidates with the BM25 top hits
+        (among the allowed rows). Returns fused rows with their similarity to
+        the query and best passage.
+        """
+        lexical_rows, _ = self.bm25.top(legal_tokens(query), depth, allowed)
         
-        # Search
-        scores, indices = self.index.search(query_embedding, top_k)
+        fused = {}
+        for ranking in (rows, lexical_rows):
+            for rank, row in enumerate(ranking):
+                fused[int(row)] = fused.get(int(row), 0.0) + 1.0 / (RRF_K + rank + 1)
+        order = sorted(fused, key=fused.get, reverse=True)
         
-        # Prepare results
+        # Lexical-only hits were not scored by FAISS; compute their cosine directly
+        known = {row: (sim, passage) for row, sim, passage in zip(rows, sims, passages)}
+        missing = sorted(row for row in order if row not in known)
+        if missing:
+            known.update(zip(missing, zip(*self._score_rows(missing, query_embedding))))
+        return order, [known[row][0] for row in order], [known[row][1] for row in order]
+    
+    def _lexical_results(self, query: str, top_k: int, allowed: np.ndarray = None) -> List[Dict]:
+        """
+        BM25-only results. Nothing was embedded, so there is no similarity to
+        report: confidence_score is None and the raw BM25 score is returned
+        as bm25_score instead.
+        """
+        rows, scores = self.bm25.top(legal_tokens(query), top_k, allowed)
+        results = self._build_results(rows.tolist(), [None] * len(rows), [0] * len(rows))
+        for result, score in zip(results, scores.tolist()):
+            result["bm25_score"] = round(score, 4)
+        return results
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters for the embedding and result caches"""
+        return {
+            "embeddings": self.embedding_cache.stats(),
+            "results": self.result_cache.stats()
+        }
+    
+    def _build_results(self, rows: List[int], scores: List[float], passages: List[int]) -> List[Dict]:
+        """
+        Turn ranked data rows into result dictionaries (passage indexes add
+        the matched passage). A score of None means no cosine was computed.
+        """
         results = []
-        for idx, score in zip(indices[0], scores[0]):
-            if idx < len(self.data):  # Ensure valid index
-                data_item = self.data[idx]
-                result = {
-                    "case_name": data_item.get("case_name", "Unknown Case"),
-                    "judgement_date": data_item.get("judgement_date", "Date not available"),
-                    "matched_question": data_item.get("question", ""),
-                    "answer": data_item.get("answer", ""),
-                    "confidence_score": float(score)
-                }
-                results.append(result)
+        for row, score, passage in zip(rows, scores, passages):
+            data_item = self.records[row]
+            result = {
+                "case_name": data_item.get("case_name", "Unknown Case"),
+                "judgement_date": data_item.get("judgement_date", "Date not available"),
+                "matched_question": data_item.get("question", ""),
+                "answer": data_item.get("answer", ""),
+                "confidence_score": float(score) if score is not None else None
+            }
+            if self.index_unit == "passage":
+                result["snippet"] = split_passages(data_item)[passage]
+            results.append(result)
         
         return results
     
     def rebuild_index(self):
         """Rebuild the FAISS index (useful if dataset is updated)"""
+        with file_lock(self.lock_path):
+            self._rebuild_files()
+        self._build_lexical_index()
+        print("Index rebuilt successfully")
+    
+    def _rebuild_files(self):
         if os.path.exists(self.index_path):
             os.remove(self.index_path)
         if os.path.exists(self.embeddings_path):
             os.remove(self.embeddings_path)
+        if os.path.exists(self.legacy_embeddings_path):
+            os.remove(self.legacy_embeddings_path)
+        if os.path.exists(self.index_meta_path):
+            os.remove(self.index_meta_path)
+        if os.path.exists(self.vector_ids_path):
+            os.remove(self.vector_ids_path)
+        
+        # Cached results point at the old index
+        self.embedding_cache.clear()
+        self.result_cache.clear()
         
         # Reload dataset
-        self.data = self._load_dataset()
-        self._create_index()
-        print("Index rebuilt successfully")
+        self.records, keys = self._load_dataset()
+        self._create_index(keys)
 
 
 # Singleton instance
 _search_engine = None
+_search_engine_lock = threading.Lock()
 
 
 def get_search_engine() -> SupremeCourtSearchEngine:
     """Get or create singleton search engine instance"""
     global _search_engine
     if _search_engine is None:
-        _search_engine = SupremeCourtSearchEngine()
+        with _search_engine_lock:
+            if _search_engine is None:
+                _search_engine = SupremeCourtSearchEngine()
     return _search_engine
 
 
+def _reset_after_fork():
+    global _search_engine_lock
+    _search_engine_lock = threading.Lock()
+    if _search_engine is not None:
+        _search_engine._after_fork()
+
+
+# gunicorn --preload imports the app (and may start warm-up) before forking workers
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
 if __name__ == "__main__":
+    import sys
+    
+    # python supreme_court_search.py --update (index new / changed judgments only)
+    if "--update" in sys.argv:
+        SupremeCourtSearchEngine().update_index()
+        sys.exit(0)
+    
+    # python supreme_court_search.py --build [--workers N] [--batch-size B]
+    # (full re-index; rerunning after an interruption resumes the encoding)
+    if "--build" in sys.argv:
+        def option(name, default):
+            return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+        engine = SupremeCourtSearchEngine(build_workers=option("--workers", BUILD_WORKERS),
+                                          build_batch_size=option("--batch-size", BUILD_BATCH_SIZE))
+        start = time.perf_counter()
+        engine.model = load_encoder(engine.model_name, engine.encoder_backend)
+        engine.rebuild_index()
+        print(f"Built {engine.index.ntotal} vectors in {time.perf_counter() - start:.1f}s")
+        sys.exit(0)
+    
+    # python supreme_court_search.py --check-encoder <backend> (cosine vs. torch reference)
+    if "--check-encoder" in sys.argv:
+        args = sys.argv[sys.argv.index("--check-encoder") + 1:]
+        engine = SupremeCourtSearchEngine()
+        texts = [item['question'] for item in itertools.islice(iter_records(engine.json_path), 500)]
+        report = check_encoder(engine.model_name, args[0] if args else ENCODER_BACKEND, texts)
+        print(json.dumps(report, indent=2))
+        sys.exit(0 if report["passed"] else 1)
+    
+    # python supreme_court_search.py --recall-report [index_type]
+    if "--recall-report" in sys.argv:
+        args = sys.argv[sys.argv.index("--recall-report") + 1:]
+        engine = SupremeCourtSearchEngine(index_type=args[0] if args else INDEX_TYPE)
+        print(json.dumps(engine.recall_report(), indent=2))
+        sys.exit(0)
+    
     # Test the search engine
     print("Initializing Supreme Court Search Engine...")
     engine = SupremeCourtSearchEngine()
@@ -185,6 +1403,9 @@ if __name__ == "__main__":
         for i, result in enumerate(results, 1):
             print(f"\n{i}. {result['case_name']}")
             print(f"   Date: {result['judgement_date']}")
-            print(f"   Confidence: {result['confidence_score']:.3f}")
+            if result['confidence_score'] is not None:
+                print(f"   Confidence: {result['confidence_score']:.3f}")
+            else:
+                print(f"   BM25: {result['bm25_score']:.3f} (citation lookup)")
             print(f"   Q: {result['matched_question'][:100]}...")
             print(f"   A: {result['answer'][:150]}...")
@@ -0,0 +1,47 @@
+"""
+Supreme Court search test data: synthetic judgments and a small
+deterministic bag-of-words stand-in for the sentence-transformers model, so
+the tests need no model download
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+DIMENSION = 16
+WORDS = ("bail custody arrest remand sanction police murder evidence appeal tax property "
+         "contract tribunal dowry rights article section accused").split()
+
+
+def write_dataset(data_dir, n=400):
+    """n synthetic judgments in data_dir/supreme_court.json"""
+    records = [
+        {
+            "case_name": f"Case {i} v. State",
+            "judgement_date": f"{1990 + i % 30}-01-15",
+            "question": " ".join(WORDS[(i * 7 + j) % len(WORDS)] for j in range(6)) + "?",
+            "answer": " ".join(WORDS[(i * 3 + j) % len(WORDS)] for j in range(40)),
+        }
+        for i in range(n)
+    ]
+    with open(os.path.join(data_dir, "supreme_court.json"), "w", encoding="utf-8") as f:
+        json.dump(records, f)
+    return records
+
+
+class WordEncoder:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def get_sentence_embedding_dimension(self):
+        return DIMENSION
+
+    def encode(self, texts, **kwargs):
+        time.sleep(self.delay)
+        vectors = np.full((len(texts), DIMENSION), 0.01, dtype='float32')
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, sum(map(ord, word)) % DIMENSION] += 1
+        return vectors
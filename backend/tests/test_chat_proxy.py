@@ -0,0 +1,227 @@
+"""
+Chat proxy tests against mock_llm_server.py on an ephemeral port: streaming,
+429 when busy, 504 on deadline / stalled upstream, 502 on upstream errors,
+and slot release after every outcome (including unread closed streams).
+"""
+
+import importlib.util
+import json
+import threading
+from contextlib import contextmanager
+
+import pytest
+from werkzeug.test import EnvironBuilder
+
+import chat_proxy
+import mock_llm_server
+from chat_proxy import ChatBusy, ChatDeadlineExceeded, ChatProxy, ChatUpstreamError
+
+
+@contextmanager
+def mock_llm(delay_ms=0, status=200):
+    server = mock_llm_server.serve(0, delay_ms, status)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def sse_events(body: str):
+    """(event, data) pairs of an SSE body"""
+    events = []
+    for frame in body.strip().split("\n\n"):
+        event, data = "message", None
+        for line in frame.splitlines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        events.append((event, data))
+    return events
+
+
+@pytest.fixture(scope="module")
+def backend_app():
+    import app as backend_app
+    return backend_app
+
+
+@pytest.fixture
+def use_proxy(backend_app, monkeypatch):
+    """Install a proxy pointed at a mock server as the app's chat proxy"""
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+
+    def install(proxy):
+        monkeypatch.setattr(backend_app, "chat_proxy", proxy)
+        return backend_app.app.test_client()
+    return install
+
+
+def test_stream_relays_deltas_and_done(use_proxy):
+    with mock_llm() as base:
+        proxy = ChatProxy(api_base=base)
+        client = use_proxy(proxy)
+        response = client.post("/api/chat/stream", json={"message": "what is bail"})
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        events = sse_events(response.get_data(as_text=True))
+    deltas = "".join(data["delta"] for event, data in events if event == "message")
+    assert deltas == "Mock reply to: what is bail"
+    assert events[-1] == ("done", {"reply": "Mock reply to: what is bail"})
+    assert proxy.active == 0
+
+
+def test_reply_returns_whole_text(use_proxy):
+    with mock_llm() as base:
+        proxy = ChatProxy(api_base=base)
+        response = use_proxy(proxy).post("/api/chat", json={"message": "hello",
+                                                            "history": [{"role": "assistant", "content": "hi"}]})
+    assert response.status_code == 200
+    assert response.get_json() == {"reply": "Mock reply to: hello"}
+    assert proxy.active == 0
+
+
+def test_busy_returns_429(use_proxy):
+    with mock_llm() as base:
+        proxy = ChatProxy(api_base=base, max_concurrency=1, queue_timeout=0.05)
+        client = use_proxy(proxy)
+        held = proxy.open_stream("hold the only slot", [], "test-key")
+        try:
+            response = client.post("/api/chat", json={"message": "hello"})
+            assert response.status_code == 429
+            assert response.headers["Retry-After"] == "1"
+            with pytest.raises(ChatBusy):
+                proxy.open_stream("again", [], "test-key")
+        finally:
+            held.close()
+        assert proxy.active == 0
+        assert client.post("/api/chat", json={"message": "hello"}).status_code == 200
+    assert proxy.active == 0
+
+
+def test_deadline_returns_504(use_proxy):
+    with mock_llm(delay_ms=150) as base:
+        proxy = ChatProxy(api_base=base, deadline=0.3, idle_timeout=1.0)
+        response = use_proxy(proxy).post("/api/chat", json={"message": "one two three four five"})
+    assert response.status_code == 504
+    assert proxy.active == 0
+
+
+def test_stalled_upstream_times_out_after_idle_timeout():
+    with mock_llm(delay_ms=2000) as base:
+        proxy = ChatProxy(api_base=base, deadline=5.0, idle_timeout=0.2)
+        stream = proxy.open_stream("hello", [], "test-key")
+        with pytest.raises(ChatDeadlineExceeded):
+            list(stream)
+    assert proxy.active == 0
+
+
+def test_deadline_midway_sends_error_event(use_proxy):
+    with mock_llm(delay_ms=150) as base:
+        proxy = ChatProxy(api_base=base, deadline=0.3, idle_timeout=1.0)
+        response = use_proxy(proxy).post("/api/chat/stream", json={"message": "one two three four five"})
+        events = sse_events(response.get_data(as_text=True))
+    assert response.status_code == 200
+    assert events[-1][0] == "error"
+    assert proxy.active == 0
+
+
+@pytest.mark.parametrize("status", [400, 500, 503])
+def test_upstream_error_returns_502(use_proxy, status):
+    with mock_llm(status=status) as base:
+        proxy = ChatProxy(api_base=base)
+        client = use_proxy(proxy)
+        assert client.post("/api/chat", json={"message": "hello"}).status_code == 502
+        assert client.post("/api/chat/stream", json={"message": "hello"}).status_code == 502
+        with pytest.raises(ChatUpstreamError):
+            proxy.reply("hello", [], "test-key")
+    assert proxy.active == 0
+
+
+def test_unreachable_upstream_returns_502(use_proxy):
+    with mock_llm() as base:
+        pass  # server is shut down: nothing listens on the port any more
+    proxy = ChatProxy(api_base=base)
+    assert use_proxy(proxy).post("/api/chat", json={"message": "hello"}).status_code == 502
+    assert proxy.active == 0
+
+
+def test_disconnect_midway_releases_slot(use_proxy):
+    with mock_llm(delay_ms=20) as base:
+        proxy = ChatProxy(api_base=base)
+        response = use_proxy(proxy).post("/api/chat/stream", json={"message": "one two three four five"},
+                                         buffered=False)
+        first = next(iter(response.response))
+        assert b"delta" in first
+        assert proxy.active == 1
+        response.close()
+    assert proxy.active == 0
+
+
+def test_unread_stream_releases_slot(use_proxy, backend_app):
+    with mock_llm() as base:
+        proxy = ChatProxy(api_base=base, max_concurrency=1, queue_timeout=0.05)
+        use_proxy(proxy)
+        for _ in range(3):
+            # The server closes the body before pulling the first chunk (the
+            # test client would pull one), so the events generator never starts
+            environ = EnvironBuilder(path="/api/chat/stream", method="POST",
+                                     json={"message": "hello"}).get_environ()
+            statuses = []
+            body = backend_app.app(environ, lambda status, headers, exc_info=None: statuses.append(status))
+            assert statuses == ["200 OK"]
+            assert proxy.active == 1
+            body.close()
+            assert proxy.active == 0
+
+
+def test_missing_message_is_rejected_without_a_slot(use_proxy):
+    proxy = ChatProxy(api_base="http://127.0.0.1:9")
+    response = use_proxy(proxy).post("/api/chat/stream", json={"message": "  "})
+    assert response.status_code == 400
+    assert proxy.active == 0
+
+
+@pytest.mark.parametrize("history", [["oops"], [{"role": "user", "content": 5}], [{"content": "hi"}]])
+def test_malformed_history_is_rejected_without_a_slot(use_proxy, history):
+    with mock_llm() as base:
+        proxy = ChatProxy(api_base=base, max_concurrency=2, queue_timeout=0.05)
+        client = use_proxy(proxy)
+        for _ in range(3):
+            assert client.post("/api/chat", json={"message": "hello", "history": history}).status_code == 400
+            assert client.post("/api/chat/stream", json={"message": "hello", "history": history}).status_code == 400
+        assert proxy.active == 0
+        assert client.post("/api/chat", json={"message": "hello"}).status_code == 200
+    assert proxy.active == 0
+
+
+def test_unexpected_errors_release_the_slot(monkeypatch):
+    proxy = ChatProxy(api_base="http://127.0.0.1:9", max_concurrency=1, queue_timeout=0.05)
+    # A history the route would reject fails before a slot is taken
+    with pytest.raises(AttributeError):
+        proxy.open_stream("hello", ["oops"], "test-key")
+    assert proxy.active == 0
+
+    def broken_session():
+        raise ValueError("not a requests error")
+    monkeypatch.setattr(proxy, "session", broken_session)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            proxy.open_stream("hello", [], "test-key")
+        assert proxy.active == 0
+
+
+def test_gemini_api_base_points_default_proxy_at_mock(monkeypatch):
+    # API_BASE is read at import: load a private copy of the module with the env set
+    with mock_llm() as base:
+        monkeypatch.setenv("GEMINI_API_BASE", base + "/")
+        spec = importlib.util.spec_from_file_location("chat_proxy_env", chat_proxy.__file__)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        assert module.API_BASE == base
+        proxy = module.ChatProxy()
+        assert proxy.reply("hello", [], "test-key") == "Mock reply to: hello"
+    assert proxy.active == 0
@@ -0,0 +1,69 @@
+"""
+Supreme Court index build: cold starts of several processes on one data
+directory build the index once and all come up with the same index.
+"""
+
+import glob
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from search_fixtures import write_dataset
+
+pytest.importorskip("faiss")
+pytest.importorskip("sentence_transformers")
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(TESTS_DIR)
+PROCESSES = 4
+
+# Cold-start one engine with a small bag-of-words encoder (no model download)
+# and print what it serves
+CHILD = """
+import json, sys
+sys.path.insert(0, sys.argv[2])
+import supreme_court_search as scs
+from search_fixtures import WordEncoder
+
+scs.load_encoder = lambda name, backend: WordEncoder(delay=0.01)  # slow enough for builds to overlap
+engine = scs.SupremeCourtSearchEngine(data_dir=sys.argv[1], build_batch_size=8, cache_size=0)
+engine._ensure_initialized()
+hits = engine.search("bail custody remand", top_k=3)
+print("RESULT " + json.dumps({"vectors": int(engine.index.ntotal), "records": len(engine.records),
+                              "hits": [hit["case_name"] for hit in hits]}))
+"""
+
+
+def cold_start(data_dir, processes):
+    children = [
+        subprocess.Popen([sys.executable, "-c", CHILD, str(data_dir), TESTS_DIR], cwd=BACKEND_DIR,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for _ in range(processes)
+    ]
+    outputs, builds = [], 0
+    for child in children:
+        stdout, stderr = child.communicate(timeout=300)
+        assert child.returncode == 0, stderr
+        outputs.append(json.loads(stdout.rsplit("RESULT ", 1)[1]))
+        builds += "Creating new FAISS index" in stdout
+    return outputs, builds
+
+
+def test_concurrent_cold_starts_build_once(tmp_path):
+    records = write_dataset(tmp_path)
+    outputs, builds = cold_start(tmp_path, PROCESSES)
+
+    assert builds == 1
+    assert all(output == outputs[0] for output in outputs)
+    assert outputs[0]["vectors"] == outputs[0]["records"] == len(records)
+    assert len(outputs[0]["hits"]) == 3
+    # Every temp file was swapped in or cleaned up
+    leftovers = [path for path in glob.glob(str(tmp_path / "*"))
+                 if path.endswith((".tmp", ".partial.npy", ".checkpoint.json"))]
+    assert leftovers == []
+
+    # A restart on the finished directory loads the same index
+    assert cold_start(tmp_path, 1) == (outputs[:1], 0)
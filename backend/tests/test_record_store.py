@@ -0,0 +1,47 @@
+"""Record store writes: concurrent writers to one path never share temp files"""
+
+import os
+import threading
+
+import pytest
+
+from record_store import RecordStore, write_atomically
+
+
+def test_concurrent_writes_leave_one_whole_store(tmp_path):
+    path = str(tmp_path / "records.bin")
+    # Same record sizes in every version: unlocked writers may pair one's data with another's offsets
+    versions = [[{"case": i, "text": str(v) * (i + 1)} for i in range(200)] for v in range(4)]
+    errors = []
+
+    def write(records):
+        try:
+            RecordStore.write(path, iter(records))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(records,)) for records in versions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    store = RecordStore(path)
+    assert len(store) == 200
+    assert [record["case"] for record in store] == list(range(200))
+    assert sorted(os.listdir(tmp_path)) == ["records.bin", "records.bin.idx.npy"]
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    with open(path, "w") as f:
+        f.write("old")
+    with pytest.raises(RuntimeError):
+        with write_atomically(path) as temp:
+            with open(temp, "w") as f:
+                f.write("partial")
+            raise RuntimeError("interrupted")
+    with open(path) as f:
+        assert f.read() == "old"
+    assert os.listdir(tmp_path) == ["manifest.json"]
@@ -0,0 +1,102 @@
+"""
+Supreme Court search on a small synthetic corpus with a bag-of-words encoder:
+citation lookups, hybrid ranking and micro-batching
+"""
+
+import threading
+
+import pytest
+
+from search_fixtures import WORDS, WordEncoder, write_dataset
+
+pytest.importorskip("faiss")
+pytest.importorskip("sentence_transformers")
+
+import supreme_court_search as scs  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def data_dir(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("supreme_court")
+    write_dataset(data_dir)
+    return str(data_dir)
+
+
+def start_engine(data_dir, **options):
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(scs, "load_encoder", lambda name, backend: WordEncoder())
+        engine = scs.SupremeCourtSearchEngine(data_dir=data_dir, cache_size=0, **options)
+        engine._ensure_initialized()
+    return engine
+
+
+@pytest.fixture(scope="module")
+def engine(data_dir):
+    return start_engine(data_dir)
+
+
+def test_citation_lookup_reports_bm25_not_confidence(engine):
+    results = engine.search("Section 19", top_k=3)
+    assert results
+    for result in results:
+        assert result["confidence_score"] is None
+        assert result["bm25_score"] > 0
+    assert [r["bm25_score"] for r in results] == sorted((r["bm25_score"] for r in results), reverse=True)
+
+
+@pytest.mark.parametrize("query, citation", [
+    ("Section 19 PMLA", True),
+    ("Article 21", True),
+    ("s. 438 CrPC", True),
+    ("Section 302 r/w 34 of the Indian Penal Code", True),
+    ("anticipatory bail under Section 438", False),
+    ("dowry death Section 304B", False),
+    ("Article 21 right to privacy", False),
+    ("bail in murder cases", False),
+])
+def test_only_bare_citations_skip_semantic_ranking(query, citation):
+    assert scs.is_citation_query(query) == citation
+
+
+def test_topical_citation_query_is_ranked_semantically(engine):
+    results = engine.search("bail custody under Section 438", top_k=3)
+    assert results
+    assert all(result["confidence_score"] is not None for result in results)
+
+
+def test_semantic_results_report_cosine(engine):
+    results = engine.search("bail custody remand", top_k=3)
+    assert results
+    for result in results:
+        assert 0 < result["confidence_score"] <= 1.0 + 1e-6
+        assert "bm25_score" not in result
+
+
+def test_batched_results_match_direct_searches(engine, data_dir):
+    batched = start_engine(data_dir, batch_max_size=64, batch_max_wait_ms=200)
+    calls = []
+    search_many = batched.batcher.search_many
+
+    def recording_search_many(queries, top_k):
+        calls.append((len(queries), top_k))
+        return search_many(queries, top_k=top_k)
+    batched.batcher.search_many = recording_search_many
+
+    # Mixed top_k in one batch: fusion depth is max(4 * top_k, 20), so 10 and 20 search deeper
+    requests = [(" ".join(WORDS[i:i + 3]), top_k) for i in range(0, 16, 2) for top_k in (1, 5, 10, 20)]
+    results = [None] * len(requests)
+    start = threading.Barrier(len(requests))
+
+    def search(n, query, top_k):
+        start.wait()
+        results[n] = batched.search(query, top_k=top_k)
+
+    threads = [threading.Thread(target=search, args=(n, *request)) for n, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert any(size > 1 for size, _ in calls)  # queries really were batched
+    for (query, top_k), result in zip(requests, results):
+        assert result == engine.search_many([query], top_k=top_k)[0]
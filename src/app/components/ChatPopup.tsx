@@ -14,17 +14,42 @@ export default function ChatPopup() {
     setLoading(true);
 
     try {
-      const res = await fetch('/api/chat', {
+      const res = await fetch('/api/chat/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ message: userMsg, history: messages.map(m => ({ role: m.role, content: m.text })) })
       });
 
-      const jr = await res.json();
-      if (!res.ok) throw new Error(jr.error || 'Chat failed');
+      if (!res.ok || !res.body) {
+        const jr = await res.json().catch(() => ({}));
+        throw new Error(jr.error || 'Chat failed');
+      }
 
-      const reply = jr.reply || jr.text || 'No response';
-      setMessages(m => [...m, {role:'assistant', text: reply}]);
+      // Server-Sent Events: append each {"delta"} to the assistant message as it arrives
+      setMessages(m => [...m, {role:'assistant', text: ''}]);
+      const appendReply = (text: string) =>
+        setMessages(m => [...m.slice(0, -1), {role:'assistant', text: m[m.length - 1].text + text}]);
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let end;
+        while ((end = buffer.indexOf('\n\n')) !== -1) {
+          const frame = buffer.slice(0, end);
+          buffer = buffer.slice(end + 2);
+          const event = frame.match(/^event: (.*)$/m)?.[1];
+          const data = frame.match(/^data: (.*)$/m)?.[1];
+          if (!data) continue;
+          const payload = JSON.parse(data);
+          if (event === 'error') throw new Error(payload.error || 'Chat failed');
+          if (payload.delta) appendReply(payload.delta);
+        }
+      }
 
     } catch (err:any) {
       setMessages(m => [...m, {role:'assistant', text: `Error: ${err.message || err}`}]);
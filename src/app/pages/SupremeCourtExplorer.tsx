@@ -11,11 +11,15 @@ interface SearchResult {
   judgement_date: string;
   matched_question: string;
   answer: string;
-  confidence_score: number;
+  // null for citation lookups, which are ranked by BM25 alone (bm25_score)
+  confidence_score: number | null;
+  bm25_score?: number;
+  snippet?: string;
 }
 
 interface APIResponse {
   query: string;
+  filters: Record<string, string | number>;
   total_results: number;
   results: SearchResult[];
   note: string;
@@ -23,6 +27,8 @@ interface APIResponse {
 
 export default function SupremeCourtExplorer() {
   const [question, setQuestion] = useState("");
+  const [yearFrom, setYearFrom] = useState("");
+  const [yearTo, setYearTo] = useState("");
   const [response, setResponse] = useState<APIResponse | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
@@ -39,13 +45,14 @@ export default function SupremeCourtExplorer() {
 
     try {
       const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000';
-      const res = await fetch(
-        `${API_URL}/api/supreme-court/search?q=${encodeURIComponent(question)}`
-      );
+      const params = new URLSearchParams({ q: question });
+      if (yearFrom.trim()) params.set("date_from", yearFrom.trim());
+      if (yearTo.trim()) params.set("date_to", yearTo.trim());
+      const res = await fetch(`${API_URL}/api/supreme-court/search?${params}`);
 
       if (!res.ok) {
         const errorData = await res.json();
-        throw new Error(errorData.message || "Search failed");
+        throw new Error(errorData.message || errorData.error || "Search failed");
       }
 
       const data: APIResponse = await res.json();
@@ -112,6 +119,22 @@ export default function SupremeCourtExplorer() {
                   {loading ? "Searching..." : "Search"}
                 </Button>
               </div>
+              <div className="flex gap-4 mt-4">
+                <Input
+                  placeholder="From year (e.g., 2010)"
+                  value={yearFrom}
+                  onChange={(e) => setYearFrom(e.target.value)}
+                  onKeyPress={handleKeyPress}
+                  disabled={loading}
+                />
+                <Input
+                  placeholder="To year (e.g., 2020)"
+                  value={yearTo}
+                  onChange={(e) => setYearTo(e.target.value)}
+                  onKeyPress={handleKeyPress}
+                  disabled={loading}
+                />
+              </div>
               <p className="text-xs text-gray-500 mt-3">
                 💡 Tip: Use legal terminology for better results (e.g., "remand", "bail", "conviction")
               </p>
@@ -168,9 +191,11 @@ export default function SupremeCourtExplorer() {
                             <Calendar className="w-4 h-4" />
                             {result.judgement_date}
                           </span>
-                          <span className="bg-[#ff9933] text-white px-3 py-1 rounded-full text-xs font-semibold">
-                            Confidence: {(result.confidence_score * 100).toFixed(1)}%
-                          </span>
+                          {result.confidence_score !== null && (
+                            <span className="bg-[#ff9933] text-white px-3 py-1 rounded-full text-xs font-semibold">
+                              Confidence: {(result.confidence_score * 100).toFixed(1)}%
+                            </span>
+                          )}
                         </div>
                       </div>
                     </div>
@@ -187,6 +212,18 @@ export default function SupremeCourtExplorer() {
                       </p>
                     </div>
 
+                    {result.snippet && (
+                      <div>
+                        <h3 className="text-base font-semibold text-[#1a2847] mb-2 flex items-center gap-2">
+                          <span className="w-2 h-2 bg-[#ff9933] rounded-full"></span>
+                          Best Matching Passage
+                        </h3>
+                        <p className="text-gray-700 bg-gray-50 p-3 rounded-lg">
+                          {result.snippet}
+                        </p>
+                      </div>
+                    )}
+
                     <div>
                       <h3 className="text-base font-semibold text-[#1a2847] mb-2 flex items-center gap-2">
                         <span className="w-2 h-2 bg-[#ff9933] rounded-full"></span>